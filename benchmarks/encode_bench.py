@@ -0,0 +1,197 @@
+"""
+Micro-benchmark matrix for the image encoding path (``image_to_base64_optimized``).
+
+Times each stage separately (decode, RGBA flatten, thumbnail, JPEG encode, base64)
+across input formats, resampling filters and JPEG qualities, and compares a few
+alternatives:
+
+- ``draft``: JPEG draft-mode decoding (DCT scaling) before thumbnail
+- ``webp``: WebP output instead of JPEG
+- ``raw``: multipart-style upload of the encoded bytes, i.e. skipping base64
+
+    python benchmarks/encode_bench.py --repeat 5 -o encode_results.json
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_inputs(workdir, large_px):
+    """Write the benchmark input files and return {name: path}."""
+    import numpy as np
+    from PIL import Image
+
+    sys.path.insert(0, BENCH_DIR)
+    from run_bench import synthetic_satellite_image
+
+    paths = {}
+
+    rgb_jpeg = os.path.join(workdir, "rgb_2048.jpg")
+    with open(rgb_jpeg, "wb") as fh:
+        fh.write(synthetic_satellite_image(2048, seed=1))
+    paths["jpeg_2048"] = rgb_jpeg
+
+    huge_jpeg = os.path.join(workdir, f"rgb_{large_px}.jpg")
+    with open(huge_jpeg, "wb") as fh:
+        fh.write(synthetic_satellite_image(large_px, seed=2))
+    paths[f"jpeg_{large_px}"] = huge_jpeg
+
+    with Image.open(rgb_jpeg) as img:
+        rgba = img.convert("RGBA")
+        alpha = np.full((img.height, img.width), 255, dtype=np.uint8)
+        alpha[: img.height // 4, :] = 0  # simulate a no-data strip
+        rgba.putalpha(Image.fromarray(alpha, "L"))
+        rgba_png = os.path.join(workdir, "rgba_2048.png")
+        rgba.save(rgba_png)
+        paths["png_rgba_2048"] = rgba_png
+
+    rng = np.random.default_rng(3)
+    band = (rng.random((2048, 2048)) * 65535).astype(np.uint16)
+    tiff16 = os.path.join(workdir, "band16_2048.tif")
+    Image.fromarray(band).save(tiff16)  # uint16 -> mode I;16
+    paths["tiff16_2048"] = tiff16
+
+    return paths
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def run_pipeline(path, max_dim, quality, resample, draft=False, fmt="JPEG", skip_base64=False):
+    """Run the encoding path stage by stage. Returns ({stage: seconds}, output_bytes)."""
+    from PIL import Image
+
+    stages = {}
+    img = Image.open(path)
+    try:
+        if draft and img.format == "JPEG":
+            _, stages["draft"] = _timed(lambda: img.draft("RGB", (max_dim, max_dim)))
+        _, stages["decode"] = _timed(img.load)
+
+        work = img
+        if work.mode in ("RGBA", "LA"):
+            def flatten():
+                background = Image.new("RGB", work.size, (255, 255, 255))
+                background.paste(work, mask=work.split()[-1])
+                return background
+            work, stages["flatten"] = _timed(flatten)
+
+        _, stages["thumbnail"] = _timed(lambda: work.thumbnail((max_dim, max_dim), resample))
+
+        buf = io.BytesIO()
+        _, stages["encode"] = _timed(lambda: work.save(buf, format=fmt, quality=quality))
+        data = buf.getvalue()
+
+        if skip_base64:
+            payload = data
+        else:
+            payload, stages["base64"] = _timed(lambda: base64.b64encode(data))
+        return stages, len(payload)
+    finally:
+        img.close()
+
+
+def bench_case(path, repeat, **kwargs):
+    runs = []
+    size = None
+    error = None
+    for _ in range(repeat):
+        try:
+            stages, size = run_pipeline(path, **kwargs)
+        except Exception as e:
+            error = str(e)
+            break
+        runs.append(stages)
+    if error:
+        return {"error": error}
+    stage_names = runs[0].keys()
+    medians = {s: round(1000 * statistics.median(r[s] for r in runs), 3) for s in stage_names}
+    return {
+        "stages_ms": medians,
+        "total_ms": round(sum(medians.values()), 3),
+        "payload_bytes": size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encoding path micro-benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--large-px", type=int, default=8000, help="Edge of the huge JPEG input")
+    parser.add_argument("--max-dims", type=int, nargs="*", default=[1024, 2048])
+    parser.add_argument("--qualities", type=int, nargs="*", default=[70, 85, 95])
+    parser.add_argument("--output", "-o")
+    args = parser.parse_args()
+
+    from PIL import Image
+
+    filters = {
+        "nearest": Image.Resampling.NEAREST,
+        "bilinear": Image.Resampling.BILINEAR,
+        "bicubic": Image.Resampling.BICUBIC,
+        "lanczos": Image.Resampling.LANCZOS,
+    }
+
+    workdir = tempfile.mkdtemp(prefix="satellisense_encode_")
+    inputs = make_inputs(workdir, args.large_px)
+
+    results = []
+    for input_name, path in inputs.items():
+        for max_dim in args.max_dims:
+            # Filter sweep at the app's default quality
+            for filter_name, resample in filters.items():
+                res = bench_case(path, args.repeat, max_dim=max_dim, quality=85, resample=resample)
+                results.append({"input": input_name, "max_dim": max_dim, "variant": "baseline",
+                                "filter": filter_name, "quality": 85, **res})
+            # Quality sweep with the default (bicubic) filter
+            for quality in args.qualities:
+                if quality == 85:
+                    continue  # already covered by the filter sweep
+                res = bench_case(path, args.repeat, max_dim=max_dim, quality=quality,
+                                 resample=filters["bicubic"])
+                results.append({"input": input_name, "max_dim": max_dim, "variant": "baseline",
+                                "filter": "bicubic", "quality": quality, **res})
+            # Alternatives
+            alternatives = {
+                "draft": {"draft": True},
+                "webp": {"fmt": "WEBP"},
+                "raw": {"skip_base64": True},
+            }
+            for variant, extra in alternatives.items():
+                res = bench_case(path, args.repeat, max_dim=max_dim, quality=85,
+                                 resample=filters["bicubic"], **extra)
+                results.append({"input": input_name, "max_dim": max_dim, "variant": variant,
+                                "filter": "bicubic", "quality": 85, **res})
+            print(f"[INFO] {input_name} @ {max_dim} done", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pillow": Image.__version__,
+            "repeat": args.repeat,
+            "inputs": {k: os.path.getsize(v) for k, v in inputs.items()},
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Cold-start benchmark: how long a fresh interpreter takes to import the app.
+
+Each sample runs in a new subprocess and records
+- ``import_ms``: ``import app``
+- ``create_app_ms``: ``create_app()`` (with and without SATELLISENSE_PRELOAD)
+- ``first_request_ms``: first ``/history`` request, which should not need any heavy module
+- which heavy modules (numpy, matplotlib, requests, cv2) are loaded after import
+
+plus the slowest modules from ``python -X importtime``.
+
+    python benchmarks/import_bench.py --repeat 10 -o import_after.json
+    python benchmarks/import_bench.py --compare import_before.json import_after.json
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+HEAVY_MODULES = ("numpy", "matplotlib", "requests", "cv2", "tifffile")
+
+# Runs inside the fresh interpreter; prints one JSON line
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app as app_module
+t1 = time.perf_counter()
+heavy = [m for m in HEAVY if m in sys.modules]
+flask_app = app_module.create_app() if hasattr(app_module, "create_app") else app_module.app
+t2 = time.perf_counter()
+client = flask_app.test_client()
+with client.session_transaction() as sess:
+    sess["username"] = "bench"
+client.get("/history")
+t3 = time.perf_counter()
+print(json.dumps({
+    "import_ms": 1000 * (t1 - t0),
+    "create_app_ms": 1000 * (t2 - t1),
+    "first_request_ms": 1000 * (t3 - t2),
+    "heavy_after_import": heavy,
+}))
+"""
+
+
+def run_probe(preload):
+    env = dict(os.environ, SATELLISENSE_PRELOAD="1" if preload else "0")
+    code = f"HEAVY = {HEAVY_MODULES!r}\n{PROBE}"
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    wall_ms = 1000 * (time.perf_counter() - start)
+    sample = json.loads(out.stdout.strip().splitlines()[-1])
+    sample["process_wall_ms"] = wall_ms
+    return sample
+
+
+def slowest_imports(limit):
+    """Top modules by cumulative import time from one ``-X importtime`` run."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)", line)
+        if match:
+            rows.append({"module": match.group(4), "self_us": int(match.group(1)),
+                         "cumulative_us": int(match.group(2)), "depth": len(match.group(3)) // 2})
+    rows.sort(key=lambda r: r["cumulative_us"], reverse=True)
+    return rows[:limit]
+
+
+def summarize(samples, key):
+    values = sorted(s[key] for s in samples)
+    return {
+        "median": round(statistics.median(values), 2),
+        "min": round(values[0], 2),
+        "max": round(values[-1], 2),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_all(args):
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "repeat": args.repeat,
+        },
+        "results": [],
+    }
+    for preload in (False, True):
+        samples = [run_probe(preload) for _ in range(args.repeat)]
+        report["results"].append({
+            "mode": "preload" if preload else "lazy",
+            "import_ms": summarize(samples, "import_ms"),
+            "create_app_ms": summarize(samples, "create_app_ms"),
+            "first_request_ms": summarize(samples, "first_request_ms"),
+            "process_wall_ms": summarize(samples, "process_wall_ms"),
+            "heavy_after_import": samples[0]["heavy_after_import"],
+        })
+        print(f"[INFO] {'preload' if preload else 'lazy'} done", file=sys.stderr)
+    report["slowest_imports"] = slowest_imports(args.top)
+    return report
+
+
+def compare(old_path, new_path):
+    """Print the median deltas between two result files."""
+    with open(old_path) as fh:
+        old = {r["mode"]: r for r in json.load(fh)["results"]}
+    with open(new_path) as fh:
+        new = {r["mode"]: r for r in json.load(fh)["results"]}
+    metrics = ("import_ms", "create_app_ms", "first_request_ms", "process_wall_ms")
+    header = f"{'mode':<10}" + "".join(f"{m:>20}" for m in metrics)
+    print(header)
+    print("-" * len(header))
+    for mode in sorted(set(old) & set(new)):
+        cells = []
+        for metric in metrics:
+            a, b = old[mode][metric]["median"], new[mode][metric]["median"]
+            pct = f" ({100.0 * (b - a) / a:+.0f}%)" if a >= 1 else ""  # skip noise on ~0 ms
+            cells.append(f"{a:.0f}->{b:.0f}{pct}")
+        print(f"{mode:<10}" + "".join(f"{c:>20}" for c in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SATELLISENSE import-time benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per mode")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    parser.add_argument("--output", "-o", help="Write JSON results here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Diff two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    text = json.dumps(run_all(args), indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Local stand-in for the Gemini ``generateContent`` endpoint.
+
+Point the app at it with the existing env var, e.g.
+
+    python benchmarks/mock_gemini.py --port 8765 --latency 0.4 --error-rate 0.05
+    GEMINI_API_BASE=http://127.0.0.1:8765/v1beta/models python app.py
+
+Only the parts of the response shape the app reads are produced
+(``candidates[0].content.parts[0].text``). Requests with
+``generationConfig.responseMimeType == "application/json"`` get a JSON body
+shaped like the app's structured analysis schema, or, when the schema asks for
+a ``results`` array (packed batch analysis), one such analysis per image.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Words the app's keyword chart extractor looks for, so charts get drawn
+FILLER_WORDS = [
+    "Water", "Vegetation", "Urban", "Forest", "Agriculture", "Cloud",
+    "Bare land", "river", "field", "road", "settlement", "canopy",
+]
+
+
+def build_text(n_chars, seed=None):
+    """Build a markdown-ish report of roughly ``n_chars`` characters."""
+    rng = random.Random(seed)
+    lines = ["## Analysis"]
+    size = len(lines[0])
+    while size < n_chars:
+        line = "- " + " ".join(rng.choice(FILLER_WORDS) for _ in range(10)) + "."
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)[: max(n_chars, 1)]
+
+
+def build_structured(n_chars, seed=None):
+    """A structured analysis reply (JSON text) with a ``summary`` of roughly ``n_chars``."""
+    return json.dumps(structured_analysis(n_chars, seed))
+
+
+def build_packed(n_images, n_chars, seed=None):
+    """A packed reply: ``{"results": [...]}`` with one indexed analysis per image."""
+    results = []
+    for index in range(1, n_images + 1):
+        entry = structured_analysis(n_chars, None if seed is None else seed + index)
+        results.append({"index": index, **entry})
+    return json.dumps({"results": results})
+
+
+def structured_analysis(n_chars, seed=None):
+    rng = random.Random(seed)
+    keys = ["water", "vegetation", "urban", "disaster", "forest", "agriculture", "cloud", "bare_land"]
+    weights = [rng.random() for _ in keys]
+    total = sum(weights)
+    return {
+        "summary": build_text(n_chars, seed),
+        "land_cover": {k: round(w / total, 3) for k, w in zip(keys, weights)},
+        "features": [
+            {"name": rng.choice(FILLER_WORDS).lower(), "category": rng.choice(keys), "confidence": round(rng.random(), 2)}
+            for _ in range(3)
+        ],
+        "severity": rng.choice(["none", "low", "moderate", "high"]),
+    }
+
+
+class MockConfig:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, response_chars=1500):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.response_chars = response_chars
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.bytes_in = 0
+
+
+def make_handler(config):
+    class GeminiHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):  # keep benchmark output clean
+            pass
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.startswith("/stats"):
+                with config.lock:
+                    stats = {
+                        "requests": config.requests,
+                        "errors": config.errors,
+                        "bytes_in": config.bytes_in,
+                    }
+                return self._send_json(200, stats)
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            with config.lock:
+                config.requests += 1
+                config.bytes_in += len(body)
+
+            if ":generateContent" not in self.path:
+                return self._send_json(404, {"error": {"message": "Not found"}})
+
+            delay = config.latency
+            if config.jitter:
+                delay += random.uniform(0, config.jitter)
+            if delay > 0:
+                time.sleep(delay)
+
+            if config.error_rate and random.random() < config.error_rate:
+                with config.lock:
+                    config.errors += 1
+                return self._send_json(
+                    503, {"error": {"code": 503, "message": "Mock overloaded"}}
+                )
+
+            try:
+                request_body = json.loads(body or b"{}")
+            except ValueError:
+                request_body = {}
+            generation_config = request_body.get("generationConfig", {})
+            schema = generation_config.get("responseSchema") or {}
+            if "results" in schema.get("properties", {}):
+                n_images = sum(
+                    1 for message in request_body.get("contents", [])
+                    for part in message.get("parts", []) if "inlineData" in part
+                )
+                text = build_packed(n_images, config.response_chars)
+            elif generation_config.get("responseMimeType") == "application/json":
+                text = build_structured(config.response_chars)
+            else:
+                text = build_text(config.response_chars)
+            self._send_json(
+                200,
+                {
+                    "candidates": [
+                        {
+                            "content": {"role": "model", "parts": [{"text": text}]},
+                            "finishReason": "STOP",
+                        }
+                    ],
+                    "usageMetadata": {"promptTokenCount": len(body) // 4},
+                },
+            )
+
+    return GeminiHandler
+
+
+def start_server(host="127.0.0.1", port=0, **kwargs):
+    """Start the mock in a daemon thread. Returns (server, base_url)."""
+    config = MockConfig(**kwargs)
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    server.config = config
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://{host}:{server.server_address[1]}/v1beta/models"
+    return server, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Gemini generateContent server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Base latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency (0..jitter s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--response-chars", type=int, default=1500, help="Size of generated text")
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency, args.jitter, args.error_rate, args.response_chars)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(config))
+    server.daemon_threads = True
+    print(f"[INFO] Mock Gemini listening on http://{args.host}:{args.port}/v1beta/models")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Load benchmark for the main Gemini-backed routes.
+
+Starts the local mock Gemini server (see mock_gemini.py), then runs every
+scenario/image-size combination in its own subprocess so that peak RSS is
+measured per scenario. Results are written as JSON so two runs can be diffed:
+
+    python benchmarks/run_bench.py --output bench_before.json
+    python benchmarks/run_bench.py --output bench_after.json
+    python benchmarks/run_bench.py --compare bench_before.json bench_after.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+
+# batch_analyze packs images into shared model calls; batch_analyze_single is the one-call-per-image path
+SCENARIOS = ["analyze_image", "batch_analyze", "batch_analyze_single", "chat", "compare_images"]
+IMAGE_SIZES = {"small": 512, "medium": 2048, "large": 6000}
+
+
+# ---------------------------
+# Synthetic imagery
+# ---------------------------
+def synthetic_satellite_image(size, seed=0, fmt="JPEG"):
+    """Return encoded bytes of a noisy, satellite-like RGB scene of ``size`` x ``size``."""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:size, 0:size].astype(np.float32) / max(size, 1)
+    # Smooth "terrain" fields plus sensor noise
+    veg = 0.5 + 0.5 * np.sin(6.0 * xx + 3.0 * yy + seed)
+    water = (np.sin(4.0 * yy - 2.0 * xx + seed) > 0.7).astype(np.float32)
+    noise = rng.normal(0, 0.08, size=(size, size)).astype(np.float32)
+    r = np.clip(0.35 * veg + 0.1 * (1 - water) + noise, 0, 1)
+    g = np.clip(0.55 * veg + 0.05 + noise, 0, 1)
+    b = np.clip(0.25 + 0.6 * water + noise, 0, 1)
+    rgb = (np.stack([r, g, b], axis=-1) * 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(rgb, "RGB").save(buf, format=fmt, quality=90)
+    return buf.getvalue()
+
+
+# ---------------------------
+# Worker side (runs inside a subprocess)
+# ---------------------------
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    if sys.platform == "darwin":
+        return rss / (1024 * 1024)
+    return rss / 1024
+
+
+def _login(client, username):
+    resp = client.post("/auth", json={"username": username, "password": "bench"})
+    if resp.status_code != 200:
+        raise RuntimeError(f"Login failed for {username}: {resp.status_code}")
+
+
+def _upload(client, image_bytes, name="scene.jpg"):
+    return client.post(
+        "/analyze_image",
+        data={"area": "Agriculture", "file": (io.BytesIO(image_bytes), name)},
+        content_type="multipart/form-data",
+    )
+
+
+def _history_ids(client):
+    return [h["id"] for h in client.get("/history").get_json().get("history", [])]
+
+
+def make_request_fn(scenario, client, images):
+    """Prepare session state for ``scenario`` and return a zero-arg request callable."""
+    if scenario == "analyze_image":
+        return lambda: _upload(client, images[0])
+
+    if scenario in ("batch_analyze", "batch_analyze_single"):
+        pack = "1" if scenario == "batch_analyze" else "0"
+
+        def batch():
+            files = [(io.BytesIO(img), f"scene_{i}.jpg") for i, img in enumerate(images)]
+            return client.post(
+                "/batch_analyze",
+                data={"area": "Agriculture", "files": files, "pack": pack},
+                content_type="multipart/form-data",
+            )
+        return batch
+
+    if scenario == "chat":
+        _upload(client, images[0])
+        return lambda: client.post("/chat", json={"message": "Describe the water bodies."})
+
+    if scenario == "compare_images":
+        for i, img in enumerate(images):
+            _upload(client, img, name=f"compare_{i}.jpg")
+        ids = _history_ids(client)
+        return lambda: client.post("/compare_images", json={"image_ids": ids})
+
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+def run_worker(args):
+    os.environ["GEMINI_API_BASE"] = args.api_base
+    os.environ.setdefault("GEMINI_API_KEY", "bench-key")
+    sys.path.insert(0, REPO_ROOT)
+
+    import app as app_module
+
+    workdir = tempfile.mkdtemp(prefix="satellisense_bench_")
+    app_module.app.config["UPLOAD_FOLDER"] = os.path.join(workdir, "uploads")
+    app_module.CHARTS_FOLDER = os.path.join(workdir, "charts")
+    os.makedirs(app_module.app.config["UPLOAD_FOLDER"], exist_ok=True)
+    os.makedirs(app_module.CHARTS_FOLDER, exist_ok=True)
+
+    size = IMAGE_SIZES[args.size]
+    images = [synthetic_satellite_image(size, seed=i) for i in range(args.images)]
+
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    remaining = [args.requests]
+
+    def take_ticket():
+        with lock:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def worker(idx):
+        client = app_module.app.test_client()
+        _login(client, f"bench_{args.scenario}_{idx}")
+        do_request = make_request_fn(args.scenario, client, images)
+        for _ in range(args.warmup):
+            do_request()
+        while take_ticket():
+            start = time.perf_counter()
+            resp = do_request()
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(worker, range(args.concurrency)))
+    wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    ok = sum(v for k, v in statuses.items() if 200 <= k < 300)
+    result = {
+        "scenario": args.scenario,
+        "image_size": args.size,
+        "image_px": size,
+        "images_per_request": args.images,
+        "concurrency": args.concurrency,
+        "requests": len(latencies),
+        "ok": ok,
+        "status_counts": {str(k): v for k, v in sorted(statuses.items())},
+        "wall_s": round(wall, 4),
+        "throughput_rps": round(len(latencies) / wall, 3) if wall > 0 else None,
+        "latency_ms": {
+            "mean": round(1000 * sum(latencies) / len(latencies), 3) if latencies else None,
+            "p50": round(1000 * percentile(latencies, 50), 3) if latencies else None,
+            "p95": round(1000 * percentile(latencies, 95), 3) if latencies else None,
+            "p99": round(1000 * percentile(latencies, 99), 3) if latencies else None,
+            "max": round(1000 * latencies[-1], 3) if latencies else None,
+        },
+        "peak_rss_mb": round(peak_rss_mb(), 2),
+    }
+    print(json.dumps(result))
+
+
+# ---------------------------
+# Orchestrator side
+# ---------------------------
+def git_revision():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, timeout=10,
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_all(args):
+    sys.path.insert(0, BENCH_DIR)
+    from mock_gemini import start_server
+
+    server, base_url = start_server(
+        latency=args.mock_latency,
+        jitter=args.mock_jitter,
+        error_rate=args.mock_error_rate,
+        response_chars=args.mock_response_chars,
+    )
+    scenarios = args.scenarios or SCENARIOS
+    sizes = args.sizes or list(IMAGE_SIZES)
+
+    results = []
+    try:
+        for scenario in scenarios:
+            for size in sizes:
+                images = args.images
+                if scenario in ("analyze_image", "chat"):
+                    images = 1
+                cmd = [
+                    sys.executable, os.path.abspath(__file__), "--worker",
+                    "--scenario", scenario, "--size", size,
+                    "--api-base", base_url,
+                    "--requests", str(args.requests),
+                    "--concurrency", str(args.concurrency),
+                    "--warmup", str(args.warmup),
+                    "--images", str(images),
+                ]
+                print(f"[INFO] Running {scenario} ({size})...", file=sys.stderr)
+                with server.config.lock:
+                    upstream_before = server.config.requests
+                proc = subprocess.run(cmd, capture_output=True, text=True)
+                with server.config.lock:
+                    upstream = server.config.requests - upstream_before
+                lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+                if proc.returncode != 0 or not lines:
+                    print(f"[ERROR] {scenario} ({size}) failed:\n{proc.stderr}", file=sys.stderr)
+                    results.append({"scenario": scenario, "image_size": size, "error": proc.stderr[-2000:]})
+                    continue
+                result = json.loads(lines[-1])
+                # Mock calls per measured request (warmup requests included in the count)
+                sent = result["requests"] + args.warmup * args.concurrency
+                result["upstream_calls_per_request"] = round(upstream / sent, 3) if sent else None
+                results.append(result)
+    finally:
+        server.shutdown()
+
+    report = {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mock": {
+                "latency_s": args.mock_latency,
+                "jitter_s": args.mock_jitter,
+                "error_rate": args.mock_error_rate,
+                "response_chars": args.mock_response_chars,
+            },
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text)
+        print(f"[INFO] Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+def compare(old_path, new_path):
+    """Print a per-scenario delta table between two result files."""
+    with open(old_path) as fh:
+        old = {(r["scenario"], r["image_size"]): r for r in json.load(fh)["results"]}
+    with open(new_path) as fh:
+        new = {(r["scenario"], r["image_size"]): r for r in json.load(fh)["results"]}
+
+    def pct(a, b):
+        if not a or b is None:
+            return "n/a"
+        return f"{100.0 * (b - a) / a:+.1f}%"
+
+    header = f"{'scenario':<22}{'size':<8}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'rss':>10}{'calls':>10}"
+    print(header)
+    print("-" * len(header))
+    for key in sorted(set(old) & set(new)):
+        a, b = old[key], new[key]
+        if "error" in a or "error" in b:
+            print(f"{key[0]:<22}{key[1]:<8}{'error':>10}")
+            continue
+        print(
+            f"{key[0]:<22}{key[1]:<8}"
+            f"{pct(a['throughput_rps'], b['throughput_rps']):>10}"
+            f"{pct(a['latency_ms']['p50'], b['latency_ms']['p50']):>10}"
+            f"{pct(a['latency_ms']['p95'], b['latency_ms']['p95']):>10}"
+            f"{pct(a['latency_ms']['p99'], b['latency_ms']['p99']):>10}"
+            f"{pct(a['peak_rss_mb'], b['peak_rss_mb']):>10}"
+            f"{pct(a.get('upstream_calls_per_request'), b.get('upstream_calls_per_request')):>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SATELLISENSE load benchmark")
+    parser.add_argument("--scenarios", nargs="*", choices=SCENARIOS)
+    parser.add_argument("--sizes", nargs="*", choices=list(IMAGE_SIZES))
+    parser.add_argument("--requests", type=int, default=20, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured requests per worker")
+    parser.add_argument("--images", type=int, default=3, help="Images per batch/compare request")
+    parser.add_argument("--mock-latency", type=float, default=0.05)
+    parser.add_argument("--mock-jitter", type=float, default=0.0)
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--mock-response-chars", type=int, default=1500)
+    parser.add_argument("--output", "-o", help="Write JSON results here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Diff two result files")
+    # Internal: single-scenario worker mode
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    parser.add_argument("--size", help=argparse.SUPPRESS)
+    parser.add_argument("--api-base", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    elif args.worker:
+        run_worker(args)
+    else:
+        run_all(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Gunicorn settings for SATELLISENSE.
+
+    gunicorn -c gunicorn.conf.py
+
+With preloading (the default) the master imports the app and its heavy modules
+once and forks workers from it, so the workers share those pages copy-on-write.
+Set GUNICORN_PRELOAD=0 to have each worker import the app itself (needed for
+per-worker code reloading).
+"""
+import gc
+import os
+
+wsgi_app = "app:create_app()"
+bind = os.environ.get("GUNICORN_BIND", "127.0.0.1:5000")
+# Users and history are shared through SQLite (STATE_DB_PATH), so workers scale
+# with the cores of the node; model calls are I/O-bound, hence the usual 2n+1
+workers = int(os.environ.get("GUNICORN_WORKERS", 2 * (os.cpu_count() or 1) + 1))
+# Enough threads that the slow admission classes (upstream and compute, at most
+# limit + queue each, see satellisense/admission.py) never occupy all of them
+threads = int(os.environ.get("GUNICORN_THREADS", 16))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1").strip().lower() not in ("0", "false", "no")
+
+if preload_app:
+    os.environ.setdefault("SATELLISENSE_PRELOAD", "1")
+
+
+def when_ready(server):
+    if preload_app:
+        # Move everything loaded so far into the permanent generation, so the
+        # workers' cyclic GC never writes to (and thereby un-shares) those pages
+        gc.freeze()
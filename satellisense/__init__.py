@@ -0,0 +1 @@
+"""Subsystems of the SATELLISENSE server that do not depend on the Flask app (see app.py)."""
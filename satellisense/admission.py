@@ -0,0 +1,97 @@
+"""Admission control: a slot limit plus a bounded wait queue per concurrency class.
+
+Routes are grouped into concurrency classes by endpoint. "upstream" routes
+wait on Gemini (for up to the 90 s API timeout) and "compute" routes do heavy
+local image work. Each class has a slot limit and a bounded wait queue, so it
+never ties up more than limit + queue server threads; the remaining threads
+stay free for every other (fast, local) route, which is never throttled. A
+request that finds its queue full, or waits past the class timeout, gets an
+immediate 503 with a Retry-After estimated from recent service times.
+"""
+import os
+import threading
+import time
+
+ADMISSION_CLASSES = {
+    "upstream": {
+        "limit": int(os.environ.get("ADMISSION_UPSTREAM_LIMIT", 4)),
+        "queue": int(os.environ.get("ADMISSION_UPSTREAM_QUEUE", 4)),
+        "timeout": float(os.environ.get("ADMISSION_UPSTREAM_TIMEOUT", 15)),
+    },
+    "compute": {
+        "limit": int(os.environ.get("ADMISSION_COMPUTE_LIMIT", 2)),
+        "queue": int(os.environ.get("ADMISSION_COMPUTE_QUEUE", 2)),
+        "timeout": float(os.environ.get("ADMISSION_COMPUTE_TIMEOUT", 10)),
+    },
+}
+
+
+class AdmissionGate:
+    """Slot limit plus a bounded wait queue for one concurrency class."""
+
+    def __init__(self, name, limit, queue, timeout):
+        self.name = name
+        self.limit = max(limit, 1)
+        self.queue = max(queue, 0)
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0  # queue full
+        self.timed_out = 0  # waited past the timeout
+        self.avg_service = None  # EWMA of seconds a slot is held
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if there is room. Returns False if the request is shed."""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            if self.active < self.limit and not self.waiting:
+                self.active += 1
+                self.admitted += 1
+                return True
+            if self.waiting >= self.queue:
+                self.rejected += 1
+                return False
+            self.waiting += 1
+            try:
+                while self.active >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timed_out += 1
+                        return False
+                    self._cond.wait(remaining)
+                self.active += 1
+                self.admitted += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self, held_seconds):
+        with self._cond:
+            self.active -= 1
+            self.avg_service = held_seconds if self.avg_service is None else (
+                0.8 * self.avg_service + 0.2 * held_seconds
+            )
+            # Wake every waiter: one whose deadline has just passed must not swallow
+            # the only wakeup and leave the slot idle (queues are small, so this is cheap)
+            self._cond.notify_all()
+
+    def retry_after(self):
+        """Seconds until the queue has likely drained enough to admit a new request."""
+        with self._cond:
+            service = self.avg_service if self.avg_service is not None else self.timeout
+            return max(1, int(service * (self.waiting + 1) / self.limit + 0.999))
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "queue": self.queue,
+                "active": self.active,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "avg_service_s": round(self.avg_service, 3) if self.avg_service is not None else None,
+            }
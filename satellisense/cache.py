@@ -0,0 +1,87 @@
+"""Bounded, thread-safe LRU mapping shared by the in-process caches."""
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Least-recently-used mapping bounded by entry count and/or total size.
+
+    ``sizeof(value)`` gives the size counted against ``max_size`` (bytes, usually);
+    a value larger than ``max_size`` on its own is not cached. ``on_evict(key,
+    value)`` is called, under the cache lock, for entries dropped to make room.
+    ``get`` marks an entry as recently used; ``in`` does not.
+    """
+
+    def __init__(self, max_entries=None, max_size=None, sizeof=None, on_evict=None):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.sizeof = sizeof or (lambda value: 1)
+        self.on_evict = on_evict
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        """Insert or replace ``key`` as the most recently used entry. Returns False if it was too large."""
+        size = self.sizeof(value)
+        if self.max_size is not None and size > self.max_size:
+            return False
+        with self._lock:
+            if key in self._data:
+                self.size -= self.sizeof(self._data.pop(key))
+            self._data[key] = value
+            self.size += size
+            while self._over_limit():
+                evicted_key, evicted = self._data.popitem(last=False)
+                self.size -= self.sizeof(evicted)
+                if self.on_evict:
+                    self.on_evict(evicted_key, evicted)
+        return True
+
+    def setdefault(self, key, value):
+        """Cache ``value`` unless ``key`` is already present; returns the cached value either way."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+        self.put(key, value)
+        return value
+
+    def _over_limit(self):
+        return ((self.max_entries is not None and len(self._data) > self.max_entries)
+                or (self.max_size is not None and self.size > self.max_size))
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            value = self._data.pop(key)
+            self.size -= self.sizeof(value)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def keys(self):
+        with self._lock:
+            return list(self._data)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._data), "size": self.size}
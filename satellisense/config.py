@@ -0,0 +1,22 @@
+"""Parsing of boolean settings from the environment and request parameters."""
+import os
+
+TRUE_VALUES = ("1", "true", "yes", "on")
+FALSE_VALUES = ("0", "false", "no", "off")
+
+
+def parse_flag(value, default=False):
+    """``value`` as a boolean: 1/true/yes/on or 0/false/no/off (any case); anything else gives ``default``."""
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower() if value is not None else ""
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    return default
+
+
+def env_flag(name, default=False):
+    """Boolean environment variable ``name``; unset, empty or unrecognised values give ``default``."""
+    return parse_flag(os.environ.get(name), default)
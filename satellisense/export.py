@@ -0,0 +1,284 @@
+"""Bulk export of history, metrics, annotations and change statistics.
+
+GET /export streams the caller's own data and ``flask export`` streams any or all
+users'. Both can write NDJSON or Parquet. The datasets are:
+    history      one row per analysis record
+    metrics      numeric metrics per record (land-cover fractions plus image
+                 metrics where they were stored; images are never decoded here)
+    annotations  one row per annotation (pixel geometry as JSON)
+    changes      land-cover deltas between consecutive records of the same user and area
+Rows are read straight from SQLite in keyset-ordered pages of ``page_rows`` and
+written out page by page (one Parquet row group per page), so memory stays flat
+however many records there are. since/until filter on the row timestamp (until
+is exclusive) and area on the record's area. Every row carries a ``cursor``;
+passing the last one received as ``after`` resumes right after that row, and
+``limit`` caps the rows per run, so large exports can be taken in ranges.
+"""
+import json
+import os
+from datetime import datetime
+
+EXPORT_PAGE_ROWS = int(os.environ.get("EXPORT_PAGE_ROWS", 1000))
+EXPORT_FORMATS = ("ndjson", "parquet")
+IMAGE_METRIC_KEYS = ("brightness_mean", "exg_mean", "vari_mean", "vegetation_fraction", "water_fraction",
+                     "bright_fraction")  # see compute_image_metrics in app.py
+
+
+def export_columns(cover_keys):
+    """Column names and types ("string" or "double") of every dataset, given the land-cover keys."""
+    cover_columns = [(f"cover_{key}", "double") for key in cover_keys]
+    return {
+        "history": [
+            ("cursor", "string"), ("id", "string"), ("username", "string"), ("timestamp", "string"),
+            ("area", "string"), ("image_url", "string"), ("severity", "string"), ("backend", "string"),
+            ("unusable_fraction", "double"), ("insights", "string"), ("features", "string"), *cover_columns,
+        ],
+        "metrics": [
+            ("cursor", "string"), ("id", "string"), ("username", "string"), ("timestamp", "string"),
+            ("area", "string"), *cover_columns, *[(key, "double") for key in IMAGE_METRIC_KEYS],
+        ],
+        "annotations": [
+            ("cursor", "string"), ("id", "string"), ("username", "string"), ("image_id", "string"),
+            ("timestamp", "string"), ("type", "string"), ("text", "string"), ("geometry", "string"),
+            ("min_x", "double"), ("min_y", "double"), ("max_x", "double"), ("max_y", "double"),
+        ],
+        "changes": [
+            ("cursor", "string"), ("username", "string"), ("area", "string"), ("from_id", "string"),
+            ("to_id", "string"), ("from_timestamp", "string"), ("to_timestamp", "string"), ("days", "double"),
+            ("from_severity", "string"), ("to_severity", "string"),
+            *[(f"delta_{name}", "double") for name, _ in cover_columns],
+        ],
+    }
+
+
+def export_options(dataset, params):
+    """Validated since/until/area/after/limit for ``dataset`` from request args or CLI options.
+
+    Raises ValueError.
+    """
+    options = {}
+    for key in ("since", "until"):
+        if params.get(key):
+            options[key] = datetime.fromisoformat(params[key]).isoformat()
+    if params.get("area"):
+        options["area"] = params["area"]
+    if params.get("after"):
+        if dataset == "annotations":
+            options["after"] = int(params["after"])
+        else:
+            options["after"] = parse_record_cursor(params["after"])
+    if params.get("limit"):
+        options["limit"] = int(params["limit"])
+        if options["limit"] < 1:
+            raise ValueError("limit must be positive")
+    return options
+
+
+def record_cursor(record):
+    return f"{record.get('timestamp', '')}|{record['id']}"
+
+
+def parse_record_cursor(cursor):
+    timestamp, sep, record_id = str(cursor).partition("|")
+    if not sep or not record_id:
+        raise ValueError("after must be a cursor from a previous export (timestamp|id)")
+    return timestamp, record_id
+
+
+class Exporter:
+    """Builds export rows page by page from the history and annotation stores."""
+
+    def __init__(self, state, annotations, cover_keys, stored_metrics, page_rows=EXPORT_PAGE_ROWS):
+        """``stored_metrics(record)`` returns a record's metrics without decoding its image."""
+        self.state = state
+        self.annotations = annotations
+        self.stored_metrics = stored_metrics
+        self.page_rows = page_rows
+        self.cover_columns = [(f"cover_{key}", "double") for key in cover_keys]
+        self.columns = export_columns(cover_keys)
+
+    def _history_row(self, username, record):
+        cover = record.get("land_cover") or {}
+        return {
+            "cursor": record_cursor(record),
+            "id": record["id"],
+            "username": username,
+            "timestamp": record.get("timestamp"),
+            "area": record.get("area"),
+            "image_url": record.get("image_url"),
+            "severity": record.get("severity"),
+            "backend": record.get("backend"),
+            "unusable_fraction": (record.get("cloud_mask") or {}).get("unusable_fraction"),
+            "insights": record.get("insights"),
+            "features": json.dumps(record["features"]) if record.get("features") is not None else None,
+            **{name: cover.get(name[len("cover_"):]) for name, _ in self.cover_columns},
+        }
+
+    def _metrics_row(self, username, record):
+        metrics = self.stored_metrics(record)
+        return {
+            "cursor": record_cursor(record),
+            "id": record["id"],
+            "username": username,
+            "timestamp": record.get("timestamp"),
+            "area": record.get("area"),
+            **{name: metrics.get(name) for name, _ in self.cover_columns},
+            **{key: metrics.get(key) for key in IMAGE_METRIC_KEYS},
+        }
+
+    @staticmethod
+    def _annotation_row(ann):
+        bbox = ann.get("bbox") or [None] * 4
+        return {
+            "cursor": str(ann["rowid"]),
+            "id": ann["id"],
+            "username": ann["username"],
+            "image_id": ann["image_id"],
+            "timestamp": ann["timestamp"],
+            "type": ann["type"],
+            "text": ann["text"],
+            "geometry": json.dumps(ann["geometry"]),
+            "min_x": bbox[0], "min_y": bbox[1], "max_x": bbox[2], "max_y": bbox[3],
+        }
+
+    def _change_row(self, username, previous, record):
+        before, after = self.stored_metrics(previous), self.stored_metrics(record)
+        try:
+            days = (datetime.fromisoformat(record["timestamp"])
+                    - datetime.fromisoformat(previous["timestamp"])).total_seconds() / 86400.0
+        except (KeyError, TypeError, ValueError):
+            days = None
+        return {
+            "cursor": record_cursor(record),
+            "username": username,
+            "area": record.get("area"),
+            "from_id": previous["id"],
+            "to_id": record["id"],
+            "from_timestamp": previous.get("timestamp"),
+            "to_timestamp": record.get("timestamp"),
+            "days": days,
+            "from_severity": previous.get("severity"),
+            "to_severity": record.get("severity"),
+            **{f"delta_{name}": after.get(name, 0.0) - before.get(name, 0.0) for name, _ in self.cover_columns},
+        }
+
+    def pages(self, dataset, username=None, since=None, until=None, area=None, after=None, limit=None):
+        """Yield lists of export rows of ``dataset`` in cursor order (at most ``page_rows`` per list).
+
+        ``after`` is a parsed cursor: an annotation rowid, or a record's (timestamp, id).
+        """
+        remaining = limit if limit is not None else float("inf")
+        if dataset == "annotations":
+            position = after or 0
+            while remaining > 0:
+                page = self.annotations.export_page(
+                    int(min(self.page_rows, remaining)), username=username, since=since, until=until, after=position
+                )
+                if not page:
+                    return
+                position = page[-1]["rowid"]
+                remaining -= len(page)
+                yield [self._annotation_row(ann) for ann in page]
+            return
+
+        key = after
+        last = {}  # {(username, area): previous record}, for "changes"; one entry per series
+        while remaining > 0:
+            page = self.state.history_page(
+                int(min(self.page_rows, remaining)) if dataset != "changes" else self.page_rows,
+                username=username, since=since, until=until, area=area, after=key,
+            )
+            if not page:
+                return
+            key = (page[-1][1].get("timestamp", ""), page[-1][1]["id"])
+            if dataset == "history":
+                rows = [self._history_row(owner, record) for owner, record in page]
+            elif dataset == "metrics":
+                rows = [self._metrics_row(owner, record) for owner, record in page]
+            else:
+                rows = []
+                for owner, record in page:
+                    series = (owner, record.get("area"))
+                    if series not in last:  # first in this run: its predecessor may predate since/after
+                        last[series] = self.state.previous_record(
+                            owner, series[1], (record.get("timestamp", ""), record["id"])
+                        )
+                    if last[series] is not None:
+                        rows.append(self._change_row(owner, last[series], record))
+                    last[series] = record
+                rows = rows[:int(min(len(rows), remaining))]
+            remaining -= len(rows)
+            if rows:
+                yield rows
+
+
+def ndjson_chunks(pages):
+    for page in pages:
+        yield "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in page).encode("utf-8")
+
+
+def gzip_chunks(chunks):
+    import zlib
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _ChunkSink:
+    """Write-only file object that hands out what was written since the last ``take()``."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def take(self):
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401  (optional)
+    except ImportError:
+        return False
+    return True
+
+
+def parquet_chunks(columns, pages):
+    """Encode pages as one Parquet file (a row group per page), yielding bytes as each group is written."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {"string": pa.string(), "double": pa.float64()}
+    schema = pa.schema([(name, types[kind]) for name, kind in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for page in pages:
+            writer.write_table(pa.Table.from_pylist(page, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
@@ -0,0 +1,748 @@
+"""SQLite-backed stores shared by every worker process, and the analytics counters over history.
+
+``StateStore`` holds users and analysis history, ``AnnotationStore`` the
+annotations. Both open one connection per thread and process in WAL mode, so
+forked server workers never share a connection and readers never block the
+writer.
+"""
+import heapq
+import json
+import os
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime
+
+HISTORY_LOG_RETAIN = int(os.environ.get("HISTORY_LOG_RETAIN", "10000"))  # change-log entries kept
+ANNOTATION_TYPES = {"point", "rect", "polygon"}
+
+
+def annotation_geometry(data):
+    """Normalise an annotation payload into (type, geometry, bbox).
+
+    Accepts the legacy ``{"x", "y"}`` point shape, ``{"type": "rect", "geometry":
+    {"x", "y", "width", "height"}}`` and ``{"type": "polygon", "geometry":
+    {"points": [[x, y], ...]}}``. Raises ValueError on malformed input.
+    """
+    kind = (data.get("type") or "point").lower()
+    if kind not in ANNOTATION_TYPES:
+        raise ValueError(f"Unknown annotation type '{kind}'")
+    geometry = data.get("geometry") or data
+    if kind == "point":
+        x, y = float(geometry["x"]), float(geometry["y"])
+        return kind, {"x": x, "y": y}, (x, y, x, y)
+    if kind == "rect":
+        x, y = float(geometry["x"]), float(geometry["y"])
+        w, h = float(geometry["width"]), float(geometry["height"])
+        if w < 0:
+            x, w = x + w, -w
+        if h < 0:
+            y, h = y + h, -h
+        return kind, {"x": x, "y": y, "width": w, "height": h}, (x, y, x + w, y + h)
+    points = [(float(px), float(py)) for px, py in geometry["points"]]
+    if len(points) < 3:
+        raise ValueError("Polygon needs at least 3 points")
+    xs = [px for px, _ in points]
+    ys = [py for _, py in points]
+    return kind, {"points": [list(pt) for pt in points]}, (min(xs), min(ys), max(xs), max(ys))
+
+
+def parse_bbox(value):
+    """Parse ``"min_x,min_y,max_x,max_y"`` (or a 4-item list) into a float tuple."""
+    parts = value.split(",") if isinstance(value, str) else list(value)
+    if len(parts) != 4:
+        raise ValueError("bbox must be min_x,min_y,max_x,max_y")
+    min_x, min_y, max_x, max_y = (float(v) for v in parts)
+    return min(min_x, max_x), min(min_y, max_y), max(min_x, max_x), max(min_y, max_y)
+
+
+def sqlite_connect(path):
+    """Open a SQLite connection in WAL mode, shared by threads of one process."""
+    import sqlite3
+
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    if path != ":memory:":
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class AnnotationStore:
+    """SQLite-backed annotation store with an R*Tree index over annotation bounding boxes.
+
+    Each (username, image_id) pair gets an integer scene key which is indexed as a
+    degenerate third R-tree dimension, so viewport queries only touch the
+    requested scene's nodes. Bounding-box queries are exact for points and
+    rectangles; polygons match on their bounding box.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _create_schema(self, conn):
+        with conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS annotation_scenes (
+                    scene INTEGER PRIMARY KEY,
+                    username TEXT NOT NULL,
+                    image_id TEXT NOT NULL,
+                    UNIQUE (username, image_id)
+                );
+                CREATE TABLE IF NOT EXISTS annotations (
+                    rowid INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    scene INTEGER NOT NULL,
+                    type TEXT NOT NULL,
+                    geometry TEXT NOT NULL,
+                    text TEXT NOT NULL DEFAULT '',
+                    timestamp TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS annotations_scene ON annotations (scene);
+                CREATE VIRTUAL TABLE IF NOT EXISTS annotations_rtree USING rtree (
+                    rowid, min_scene, max_scene, min_x, max_x, min_y, max_y
+                );
+                """
+            )
+
+    def _conn(self):
+        # Opened lazily and per process: a connection inherited across fork must not be reused
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite_connect(self.path)
+            self._local.conn, self._local.pid = conn, os.getpid()
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self._create_schema(conn)
+                    self._schema_ready = True
+        return conn
+
+    def _transaction(self):
+        conn = self._conn()
+        # Take the write lock up front: another process holding it would make a
+        # deferred transaction fail on upgrade instead of waiting
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    def _scene(self, conn, username, image_id, create=False):
+        row = conn.execute(
+            "SELECT scene FROM annotation_scenes WHERE username = ? AND image_id = ?",
+            (username, image_id),
+        ).fetchone()
+        if row:
+            return row["scene"]
+        if not create:
+            return None
+        cur = conn.execute(
+            "INSERT INTO annotation_scenes (username, image_id) VALUES (?, ?)", (username, image_id)
+        )
+        return cur.lastrowid
+
+    @staticmethod
+    def _to_dict(row):
+        geometry = json.loads(row["geometry"])
+        ann = {
+            "id": row["id"],
+            "type": row["type"],
+            "geometry": geometry,
+            "text": row["text"],
+            "timestamp": row["timestamp"],
+        }
+        if "min_x" in row.keys():
+            ann["bbox"] = [row["min_x"], row["min_y"], row["max_x"], row["max_y"]]
+        if row["type"] == "point":
+            ann["x"], ann["y"] = geometry["x"], geometry["y"]
+        return ann
+
+    def add_many(self, username, image_id, items):
+        """Validate and insert annotations in one transaction. Returns the stored dicts."""
+        prepared = []
+        for item in items:
+            kind, geometry, bbox = annotation_geometry(item)
+            prepared.append((kind, geometry, bbox, str(item.get("text") or "")))
+
+        created = []
+        now = datetime.now().isoformat()
+        with self._write_lock, self._transaction() as conn:
+            scene = self._scene(conn, username, image_id, create=True)
+            for kind, geometry, bbox, text in prepared:
+                ann_id = f"ann_{uuid.uuid4().hex}"
+                cur = conn.execute(
+                    "INSERT INTO annotations (id, scene, type, geometry, text, timestamp) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (ann_id, scene, kind, json.dumps(geometry), text, now),
+                )
+                min_x, min_y, max_x, max_y = bbox
+                conn.execute(
+                    "INSERT INTO annotations_rtree VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (cur.lastrowid, scene, scene, min_x, max_x, min_y, max_y),
+                )
+                created.append({
+                    "id": ann_id,
+                    "type": kind,
+                    "geometry": geometry,
+                    "text": text,
+                    "timestamp": now,
+                    "bbox": list(bbox),
+                    **({"x": geometry["x"], "y": geometry["y"]} if kind == "point" else {}),
+                })
+        return created
+
+    def query(self, username, image_id, bbox=None, limit=None):
+        """Annotations for one image, optionally only those intersecting ``bbox``."""
+        conn = self._conn()
+        scene = self._scene(conn, username, image_id)
+        if scene is None:
+            return []
+        sql = (
+            "SELECT a.*, r.min_x, r.min_y, r.max_x, r.max_y FROM annotations_rtree r "
+            "JOIN annotations a ON a.rowid = r.rowid "
+            "WHERE r.min_scene <= ? AND r.max_scene >= ?"
+        )
+        params = [scene, scene]
+        if bbox is not None:
+            min_x, min_y, max_x, max_y = bbox
+            sql += " AND r.max_x >= ? AND r.min_x <= ? AND r.max_y >= ? AND r.min_y <= ?"
+            params += [min_x, max_x, min_y, max_y]
+        sql += " ORDER BY a.rowid"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [self._to_dict(row) for row in conn.execute(sql, params)]
+
+    def export_page(self, limit, username=None, since=None, until=None, after=0):
+        """Up to ``limit`` annotations (with owner and image id) in rowid order after ``after``."""
+        sql = (
+            "SELECT a.*, s.username, s.image_id, r.min_x, r.min_y, r.max_x, r.max_y FROM annotations a "
+            "JOIN annotation_scenes s ON s.scene = a.scene "
+            "LEFT JOIN annotations_rtree r ON r.rowid = a.rowid WHERE a.rowid > ?"
+        )
+        params = [after]
+        if username:
+            sql += " AND s.username = ?"
+            params.append(username)
+        if since:
+            sql += " AND a.timestamp >= ?"
+            params.append(since)
+        if until:
+            sql += " AND a.timestamp < ?"
+            params.append(until)
+        sql += " ORDER BY a.rowid LIMIT ?"
+        params.append(limit)
+        rows = []
+        for row in self._conn().execute(sql, params):
+            ann = self._to_dict(row)
+            ann.update(rowid=row["rowid"], username=row["username"], image_id=row["image_id"])
+            rows.append(ann)
+        return rows
+
+    def image_ids(self, username):
+        rows = self._conn().execute(
+            "SELECT image_id FROM annotation_scenes WHERE username = ? ORDER BY scene", (username,)
+        )
+        return [row["image_id"] for row in rows]
+
+    def delete(self, username, image_id, ids=None, bbox=None):
+        """Delete by id list, by bounding box, or (both None) every annotation on the image.
+
+        Returns the number of annotations removed.
+        """
+        with self._write_lock, self._transaction() as conn:
+            scene = self._scene(conn, username, image_id)
+            if scene is None:
+                return 0
+            if ids is not None:
+                rowids = []
+                ids = list(ids)
+                for start in range(0, len(ids), 500):  # stay under SQLite's variable limit
+                    chunk = ids[start:start + 500]
+                    marks = ",".join("?" * len(chunk))
+                    rowids += [
+                        row["rowid"] for row in conn.execute(
+                            f"SELECT rowid FROM annotations WHERE scene = ? AND id IN ({marks})",
+                            [scene, *chunk],
+                        )
+                    ]
+            elif bbox is not None:
+                min_x, min_y, max_x, max_y = bbox
+                rowids = [
+                    row["rowid"] for row in conn.execute(
+                        "SELECT rowid FROM annotations_rtree WHERE min_scene <= ? AND max_scene >= ? "
+                        "AND max_x >= ? AND min_x <= ? AND max_y >= ? AND min_y <= ?",
+                        (scene, scene, min_x, max_x, min_y, max_y),
+                    )
+                ]
+            else:
+                rowids = [
+                    row["rowid"] for row in conn.execute(
+                        "SELECT rowid FROM annotations WHERE scene = ?", (scene,)
+                    )
+                ]
+            params = [(rowid,) for rowid in rowids]
+            conn.executemany("DELETE FROM annotations WHERE rowid = ?", params)
+            conn.executemany("DELETE FROM annotations_rtree WHERE rowid = ?", params)
+            return len(rowids)
+
+
+class AnalyticsAggregates:
+    """Running counters over a set of history records, updated on every append/delete."""
+
+    RECENT_LIMIT = 10
+    RECENT_BUFFER = 50  # extra entries kept so deletes rarely force a rescan
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.total = 0
+        self.by_area = Counter()
+        self.by_day = Counter()
+        self.by_week = Counter()
+        self.by_month = Counter()
+        self.by_severity = Counter()
+        self.by_feature = Counter()  # detected feature categories
+        self.land_cover_sum = Counter()
+        self.structured = 0
+        self._recent = []  # min-heap of (timestamp, seq, id, area)
+        self._seq = 0
+        self.needs_rebuild = False
+
+    @staticmethod
+    def _periods(timestamp):
+        day = timestamp[:10]
+        if not day:
+            return None, None, None
+        try:
+            year, week, _ = datetime.fromisoformat(day).isocalendar()
+            week_key = f"{year}-W{week:02d}"
+        except ValueError:
+            week_key = None
+        return day, week_key, day[:7]
+
+    def _count(self, record, delta):
+        self.total += delta
+        day, week, month = self._periods(record.get("timestamp", ""))
+        updates = (
+            (self.by_area, record.get("area", "Unknown")),
+            (self.by_day, day),
+            (self.by_week, week),
+            (self.by_month, month),
+        )
+        for counter, key in updates:
+            if not key:
+                continue
+            counter[key] += delta
+            if counter[key] <= 0:
+                del counter[key]  # keep snapshots identical to a fresh recount
+        if record.get("land_cover"):
+            self.structured += delta
+            self.by_severity[record.get("severity", "none")] += delta
+            for key, value in record["land_cover"].items():
+                self.land_cover_sum[key] += delta * value
+            for feature in record.get("features", []):
+                self.by_feature[feature["category"]] += delta
+            for counter in (self.by_severity, self.by_feature, self.land_cover_sum):
+                for key in [k for k, v in counter.items() if v <= 1e-9]:
+                    del counter[key]
+
+    def _push_recent(self, record):
+        self._seq += 1
+        entry = (record.get("timestamp", ""), self._seq, record["id"], record.get("area", ""))
+        if len(self._recent) < self.RECENT_BUFFER:
+            heapq.heappush(self._recent, entry)
+        elif entry > self._recent[0]:
+            heapq.heapreplace(self._recent, entry)
+
+    def add(self, record):
+        with self.lock:
+            self._count(record, 1)
+            self._push_recent(record)
+
+    def remove(self, record):
+        with self.lock:
+            self._count(record, -1)
+            timestamp = record.get("timestamp", "")
+            for i, entry in enumerate(self._recent):
+                if entry[0] == timestamp and entry[2] == record["id"]:
+                    self._recent[i] = self._recent[-1]
+                    self._recent.pop()
+                    heapq.heapify(self._recent)
+                    break
+            # The buffer can only be refilled from the full history
+            if len(self._recent) < min(self.RECENT_LIMIT, self.total):
+                self.needs_rebuild = True
+
+    def recent(self, limit=RECENT_LIMIT):
+        with self.lock:
+            entries = heapq.nlargest(limit, self._recent)
+        return [{"id": e[2], "timestamp": e[0], "area": e[3]} for e in entries]
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "total_analyses": self.total,
+                "area_distribution": dict(self.by_area),
+                "analyses_by_date": dict(self.by_day),
+                "analyses_by_week": dict(self.by_week),
+                "analyses_by_month": dict(self.by_month),
+                "structured_analyses": self.structured,
+                "severity_distribution": dict(self.by_severity),
+                "feature_categories": dict(self.by_feature),
+                "mean_land_cover": {
+                    key: round(value / self.structured, 4) for key, value in self.land_cover_sum.items()
+                } if self.structured else {},
+            }
+
+
+class StateStore:
+    """Users and analysis history in SQLite, shared by all worker processes.
+
+    Every history write also appends to ``history_log`` and bumps the user's
+    row in ``history_versions``; ``changes(since)`` returns the entries after a
+    log sequence number, which is how each process keeps its in-memory cache
+    current. Only the last ``log_retain`` entries are kept.
+    """
+
+    def __init__(self, path, log_retain=HISTORY_LOG_RETAIN):
+        self.path = path
+        self.log_retain = log_retain
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _create_schema(self, conn):
+        with conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS users (
+                    username TEXT PRIMARY KEY,
+                    password_hash TEXT NOT NULL,
+                    created TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS history (
+                    id TEXT PRIMARY KEY,
+                    username TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    data TEXT NOT NULL
+                );
+                DROP INDEX IF EXISTS history_user_time;
+                CREATE INDEX IF NOT EXISTS history_user_key ON history (username, timestamp, id);
+                CREATE INDEX IF NOT EXISTS history_time ON history (timestamp, id);
+                CREATE TABLE IF NOT EXISTS history_log (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    op TEXT NOT NULL,
+                    username TEXT NOT NULL,
+                    record_id TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS history_versions (
+                    username TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS settings (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+                """
+            )
+            # Databases created before history_versions existed: derive it once from the log
+            conn.execute(
+                "INSERT OR IGNORE INTO history_versions (username, version) "
+                "SELECT username, max(seq) FROM history_log GROUP BY username"
+            )
+
+    def _conn(self):
+        # Same per-thread, per-process connection handling as AnnotationStore
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite_connect(self.path)
+            self._local.conn, self._local.pid = conn, os.getpid()
+            self._local.data_version = None
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self._create_schema(conn)
+                    self._schema_ready = True
+        return conn
+
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")  # see AnnotationStore._transaction
+        return conn
+
+    def close(self):
+        """Close this thread's connection (e.g. in a preloading master before it forks)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
+
+    # Users
+    def login_or_register(self, username, password):
+        """Check the password of an existing user, or create the user. Returns False on a wrong password."""
+        from werkzeug.security import check_password_hash, generate_password_hash
+
+        row = self._conn().execute(
+            "SELECT password_hash FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        if row is None:
+            with self._transaction() as conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO users (username, password_hash, created) VALUES (?, ?, ?)",
+                    (username, generate_password_hash(password), datetime.now().isoformat()),
+                )
+            # Another worker may have registered the same name first
+            row = self._conn().execute(
+                "SELECT password_hash FROM users WHERE username = ?", (username,)
+            ).fetchone()
+        return check_password_hash(row["password_hash"], password)
+
+    def usernames(self):
+        return [row["username"] for row in self._conn().execute("SELECT username FROM users")]
+
+    def secret_key(self):
+        """A session signing key shared by all workers, generated on first use."""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO settings (key, value) VALUES ('secret_key', ?)", (os.urandom(32).hex(),)
+            )
+            return bytes.fromhex(conn.execute("SELECT value FROM settings WHERE key = 'secret_key'").fetchone()[0])
+
+    # History
+    def add_records(self, username, records):
+        """Insert (or replace) records and log them. Returns the last log sequence number."""
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO history (id, username, timestamp, data) VALUES (?, ?, ?, ?)",
+                [(r["id"], username, r.get("timestamp", ""), json.dumps(r)) for r in records],
+            )
+            conn.executemany(
+                "INSERT INTO history_log (op, username, record_id) VALUES ('add', ?, ?)",
+                [(username, r["id"]) for r in records],
+            )
+            return self._logged(conn, username)
+
+    def delete_record(self, username, record_id):
+        """Delete a record. Returns the stored record, or None if it did not exist."""
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT data FROM history WHERE id = ? AND username = ?", (record_id, username)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM history WHERE id = ?", (record_id,))
+            conn.execute(
+                "INSERT INTO history_log (op, username, record_id) VALUES ('delete', ?, ?)", (username, record_id)
+            )
+            self._logged(conn, username)
+            return json.loads(row["data"])
+
+    def update_record(self, record_id, fields):
+        """Set top-level fields of a stored record and log the change. Returns the log seq, or None."""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT username FROM history WHERE id = ?", (record_id,)).fetchone()
+            if row is None:
+                return None
+            paths = ", ".join("?, json(?)" for _ in fields)
+            params = [value for key, field in fields.items() for value in (f"$.{key}", json.dumps(field))]
+            conn.execute(f"UPDATE history SET data = json_set(data, {paths}) WHERE id = ?", (*params, record_id))
+            conn.execute(
+                "INSERT INTO history_log (op, username, record_id) VALUES ('update', ?, ?)",
+                (row["username"], record_id),
+            )
+            return self._logged(conn, row["username"])
+
+    def _logged(self, conn, username):
+        """Record the user's new version after a logged write and compact the log. Returns the last seq."""
+        seq = conn.execute("SELECT max(seq) FROM history_log").fetchone()[0]
+        conn.execute("INSERT OR REPLACE INTO history_versions (username, version) VALUES (?, ?)", (username, seq))
+        # Only the tail of the log is kept; a worker whose cursor falls below the floor starts over
+        floor = self._log_floor(conn)
+        if seq - floor >= 2 * self.log_retain:
+            floor = seq - self.log_retain
+            conn.execute("DELETE FROM history_log WHERE seq <= ?", (floor,))
+            conn.execute(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES ('history_log_floor', ?)", (str(floor),)
+            )
+        return seq
+
+    @staticmethod
+    def _log_floor(conn):
+        row = conn.execute("SELECT value FROM settings WHERE key = 'history_log_floor'").fetchone()
+        return int(row[0]) if row else 0
+
+    def data_changed(self):
+        """True if another connection has committed since this thread last asked (``PRAGMA data_version``).
+
+        The pragma reads no tables, so the per-request check for other workers' writes is nearly free.
+        """
+        version = self._conn().execute("PRAGMA data_version").fetchone()[0]
+        changed = version != self._local.data_version
+        self._local.data_version = version
+        return changed
+
+    def last_seq(self):
+        return self._conn().execute("SELECT coalesce(max(seq), 0) FROM history_log").fetchone()[0]
+
+    def user_version(self, username):
+        """Log seq of the user's last history change (0 if none); the same in every worker."""
+        row = self._conn().execute(
+            "SELECT version FROM history_versions WHERE username = ?", (username,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def history_usernames(self):
+        return [row["username"] for row in self._conn().execute("SELECT username FROM history_versions")]
+
+    def user_records(self, username):
+        """The user's records sorted by (timestamp, id)."""
+        rows = self._conn().execute(
+            "SELECT data FROM history WHERE username = ? ORDER BY timestamp, id", (username,)
+        )
+        return [json.loads(row["data"]) for row in rows]
+
+    def get_record(self, username, record_id):
+        row = self._conn().execute(
+            "SELECT data FROM history WHERE id = ? AND username = ?", (record_id, username)
+        ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def changes(self, since):
+        """Log entries after ``since`` as (seq, op, username, record_id, record or None).
+
+        Returns None if entries after ``since`` have been compacted away.
+        """
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            if since < self._log_floor(conn):
+                return None
+            rows = conn.execute(
+                "SELECT l.seq, l.op, l.username, l.record_id, h.data FROM history_log l "
+                "LEFT JOIN history h ON h.id = l.record_id WHERE l.seq > ? ORDER BY l.seq",
+                (since,),
+            ).fetchall()
+        return [
+            (row["seq"], row["op"], row["username"], row["record_id"], json.loads(row["data"]) if row["data"] else None)
+            for row in rows
+        ]
+
+    def records(self, page_size=1000):
+        """Every (username, record), read a page at a time."""
+        after = None
+        while True:
+            page = self.history_page(page_size, after=after)
+            yield from page
+            if len(page) < page_size:
+                return
+            after = (page[-1][1].get("timestamp", ""), page[-1][1]["id"])
+
+    def history_desc(self, username, limit, before=None, since=None, until=None, area=None, severity=None):
+        """Up to ``limit`` of the user's records, newest first by (timestamp, id), before the key ``before``.
+
+        ``since`` is inclusive and so is ``until``.
+        """
+        sql = "SELECT data FROM history WHERE username = ?"
+        params = [username]
+        if since:
+            sql += " AND timestamp >= ?"
+            params.append(since)
+        if until:
+            sql += " AND timestamp <= ?"
+            params.append(until)
+        if area:
+            sql += " AND json_extract(data, '$.area') = ?"
+            params.append(area)
+        if severity:
+            sql += " AND json_extract(data, '$.severity') = ?"
+            params.append(severity)
+        if before:
+            sql += " AND (timestamp, id) < (?, ?)"
+            params += list(before)
+        sql += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        return [json.loads(row["data"]) for row in self._conn().execute(sql, params)]
+
+    def aggregates(self):
+        """Analytics counters over every user's history, computed in SQL.
+
+        Same shape as ``AnalyticsAggregates.snapshot()`` plus ``active_users``.
+        """
+        structured = "json_type(data, '$.land_cover') = 'object' AND json_extract(data, '$.land_cover') != '{}'"
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            total, users = conn.execute("SELECT count(*), count(DISTINCT username) FROM history").fetchone()
+            by_area = conn.execute(
+                "SELECT coalesce(json_extract(data, '$.area'), 'Unknown'), count(*) FROM history GROUP BY 1"
+            ).fetchall()
+            by_day = conn.execute("SELECT substr(timestamp, 1, 10), count(*) FROM history GROUP BY 1").fetchall()
+            n_structured = conn.execute(f"SELECT count(*) FROM history WHERE {structured}").fetchone()[0]
+            by_severity = conn.execute(
+                f"SELECT coalesce(json_extract(data, '$.severity'), 'none'), count(*) FROM history "
+                f"WHERE {structured} GROUP BY 1"
+            ).fetchall()
+            by_feature = conn.execute(
+                f"SELECT json_extract(f.value, '$.category'), count(*) FROM history, "
+                f"json_each(history.data, '$.features') f WHERE {structured} GROUP BY 1"
+            ).fetchall()
+            land_cover = conn.execute(
+                f"SELECT c.key, sum(c.value) FROM history, json_each(history.data, '$.land_cover') c "
+                f"WHERE {structured} GROUP BY 1"
+            ).fetchall()
+        by_week, by_month = Counter(), Counter()
+        for day, count in by_day:
+            _, week, month = AnalyticsAggregates._periods(day)
+            if week:
+                by_week[week] += count
+            if month:
+                by_month[month] += count
+        return {
+            "total_analyses": total,
+            "area_distribution": {key: count for key, count in by_area if key},
+            "analyses_by_date": {key: count for key, count in by_day if key},
+            "analyses_by_week": dict(by_week),
+            "analyses_by_month": dict(by_month),
+            "structured_analyses": n_structured,
+            "severity_distribution": dict(by_severity),
+            "feature_categories": {key: count for key, count in by_feature if key},
+            "mean_land_cover": {
+                key: round(value / n_structured, 4) for key, value in land_cover if value > 1e-9
+            } if n_structured else {},
+            "active_users": users,
+        }
+
+    def history_page(self, limit, username=None, since=None, until=None, area=None, after=None):
+        """Up to ``limit`` (username, record) pairs ordered by (timestamp, id), after the key ``after``."""
+        sql = "SELECT username, data FROM history WHERE 1 = 1"
+        params = []
+        if username:
+            sql += " AND username = ?"
+            params.append(username)
+        if since:
+            sql += " AND timestamp >= ?"
+            params.append(since)
+        if until:
+            sql += " AND timestamp < ?"
+            params.append(until)
+        if area:
+            sql += " AND json_extract(data, '$.area') = ?"
+            params.append(area)
+        if after:
+            sql += " AND (timestamp, id) > (?, ?)"
+            params += list(after)
+        sql += " ORDER BY timestamp, id LIMIT ?"
+        params.append(limit)
+        return [(row["username"], json.loads(row["data"])) for row in self._conn().execute(sql, params)]
+
+    def previous_record(self, username, area, before):
+        """The user's latest record for ``area`` ordered before the (timestamp, id) key ``before``, or None."""
+        row = self._conn().execute(
+            "SELECT data FROM history WHERE username = ? AND json_extract(data, '$.area') IS ? "
+            "AND (timestamp, id) < (?, ?) ORDER BY timestamp DESC, id DESC LIMIT 1",
+            (username, area, *before),
+        ).fetchone()
+        return json.loads(row["data"]) if row else None
@@ -0,0 +1,287 @@
+"""Storage lifecycle for uploads and generated charts.
+
+New uploads go into hash-prefix shard directories (uploads/ab/cd/<name>) so no
+single directory grows unbounded. Files are either originals (uploads, pinned:
+never evicted automatically), derived (masks, pyramid levels, processed_*
+outputs, chart-folder previews and heatmaps; always recomputable) or pinned
+charts. Derived files are evicted least-recently-used when a user or the whole
+store exceeds its quota and once they pass DERIVED_TTL_SECONDS without use.
+``flask storage-gc`` removes orphans no history record references.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+STORAGE_USER_QUOTA_BYTES = int(os.environ.get("STORAGE_USER_QUOTA_BYTES", 2 * 1024 ** 3))
+STORAGE_TOTAL_QUOTA_BYTES = int(os.environ.get("STORAGE_TOTAL_QUOTA_BYTES", 20 * 1024 ** 3))
+DERIVED_TTL_SECONDS = float(os.environ.get("DERIVED_TTL_SECONDS", 7 * 24 * 3600))
+STORAGE_SWEEP_INTERVAL = int(os.environ.get("STORAGE_SWEEP_INTERVAL", 600))
+ORPHAN_GRACE_SECONDS = 3600  # uploads younger than this may still be mid-request
+PINNED_CHARTS = {"pie_chart.png", "line_chart.png"}
+DERIVED_SUFFIX = re.compile(r"_(mask\.png|pyr\d+\.jpg)$")
+PROCESSED_PREFIX = re.compile(r"^processed_\d+_")
+
+
+def shard_path(folder, filename):
+    digest = hashlib.sha1(filename.encode("utf-8")).hexdigest()
+    return os.path.join(folder, digest[:2], digest[2:4], filename)
+
+
+class StorageManager:
+    """Size/recency index over the upload and chart folders with quota-driven eviction."""
+
+    def __init__(self, folders, usernames, referenced_paths=None, schedule=None):
+        """``folders()`` returns (upload folder, charts folder); ``usernames()`` every known user;
+        ``referenced_paths()`` the image paths history still points at; ``schedule(key, fn)``
+        queues a background sweep (it runs inline when omitted).
+        """
+        self.folders = folders
+        self.usernames = usernames
+        self.referenced_paths = referenced_paths or (lambda: ())
+        self.schedule = schedule or (lambda key, fn: fn())
+        self.user_quota = STORAGE_USER_QUOTA_BYTES
+        self.total_quota = STORAGE_TOTAL_QUOTA_BYTES
+        self.derived_ttl = DERIVED_TTL_SECONDS
+        self.sweep_interval = STORAGE_SWEEP_INTERVAL
+        self.lock = threading.RLock()
+        self.entries = {}  # {path: {"owner", "kind", "size", "atime"}}
+        self.stem_owners = {}  # {(dir, original stem): owner}
+        self.totals = Counter()  # {(owner, kind): bytes}, kept in step with entries
+        self.scanned = False
+        self.started = time.time()
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+
+    def _roots(self):
+        return list(self.folders())
+
+    def classify(self, path):
+        name = os.path.basename(path)
+        if os.path.abspath(path).startswith(os.path.abspath(self.folders()[1]) + os.sep):
+            return "pinned" if name in PINNED_CHARTS else "derived"
+        if DERIVED_SUFFIX.search(name) or PROCESSED_PREFIX.match(name):
+            return "derived"
+        return "original"
+
+    def known_users(self):
+        """Every username, longest first (one query; fetch once per scan, not per file)."""
+        return sorted(set(self.usernames()), key=len, reverse=True)
+
+    def owner_of(self, path, users=None):
+        charts_root = os.path.abspath(self.folders()[1]) + os.sep
+        abs_path = os.path.abspath(path)
+        if abs_path.startswith(charts_root):
+            return abs_path[len(charts_root):].split(os.sep, 1)[0]
+        name = PROCESSED_PREFIX.sub("", os.path.basename(path))
+        # Upload names are "<username>_<timestamp>_<file>"; prefer the longest match
+        for user in self.known_users() if users is None else users:
+            if name.startswith(f"{user}_"):
+                return user
+        return None
+
+    def _add(self, path, owner=None, users=None):
+        st = os.stat(path)
+        kind = self.classify(path)
+        name = os.path.basename(path)
+        stem = os.path.splitext(name)[0] if kind == "original" else DERIVED_SUFFIX.sub("", name)
+        stem_key = (os.path.dirname(path), stem)
+        if owner is None:
+            # Masks and pyramid levels belong to whoever owns the original next to them
+            owner = self.stem_owners.get(stem_key) or self.owner_of(path, users)
+        if kind == "original" and owner:
+            self.stem_owners[stem_key] = owner
+        self._drop(path)
+        self.entries[path] = {
+            "owner": owner,
+            "kind": kind,
+            "size": st.st_size,
+            "atime": max(st.st_atime, st.st_mtime),
+        }
+        self.totals[(owner, kind)] += st.st_size
+
+    def _drop(self, path):
+        """Forget an index entry (the file itself is left alone). Returns the entry or None."""
+        entry = self.entries.pop(path, None)
+        if entry:
+            self.totals[(entry["owner"], entry["kind"])] -= entry["size"]
+        return entry
+
+    def scan(self):
+        """Rebuild the index from disk, keeping access times recorded in-process."""
+        with self.lock:
+            previous, self.entries = self.entries, {}
+            self.totals = Counter()
+            users = self.known_users()
+            for root in self._roots():
+                for dirpath, _, filenames in os.walk(root):
+                    for name in filenames:
+                        if ".tmp" in name:
+                            continue  # being written atomically
+                        path = os.path.join(dirpath, name)
+                        old = previous.get(path)
+                        try:
+                            self._add(path, old["owner"] if old else None, users)
+                        except OSError:
+                            continue  # removed while scanning
+                        if old:
+                            self.entries[path]["atime"] = max(self.entries[path]["atime"], old["atime"])
+            self.scanned = True
+
+    def _ensure_index(self):
+        if not self.scanned:
+            self.scan()
+
+    def register(self, path, owner=None, enforce=True):
+        """Record a newly written file and (unless ``enforce`` is False) enforce quotas for its owner."""
+        with self.lock:
+            self._ensure_index()
+            try:
+                self._add(path, owner)
+            except OSError:
+                return
+            owner = self.entries[path]["owner"]
+        if enforce:
+            self.enforce(owner)
+            self.maybe_sweep()
+
+    def touch(self, path):
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry:
+                entry["atime"] = time.time()
+
+    def usage(self, owner=None):
+        """Bytes per kind for one owner (or everything when ``owner`` is None)."""
+        with self.lock:
+            self._ensure_index()
+            totals = Counter()
+            for (entry_owner, kind), size in self.totals.items():
+                if size and (owner is None or entry_owner == owner):
+                    totals[kind] += size
+                    totals["total"] += size
+            return dict(totals)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"[WARN] Could not remove {path}: {e}")
+            return 0
+        entry = self._drop(path)
+        if entry:
+            self.evicted_files += 1
+            self.evicted_bytes += entry["size"]
+            return entry["size"]
+        return 0
+
+    def evict(self, bytes_needed, owner=None):
+        """Delete least-recently-used derived files until ``bytes_needed`` are freed. Returns bytes freed."""
+        with self.lock:
+            candidates = sorted(
+                (entry["atime"], path) for path, entry in self.entries.items()
+                if entry["kind"] == "derived" and (owner is None or entry["owner"] == owner)
+            )
+            freed = 0
+            for _, path in candidates:
+                if freed >= bytes_needed:
+                    break
+                freed += self._remove(path)
+            return freed
+
+    def enforce(self, owner=None, incoming_bytes=0):
+        """Evict derived files until the owner's and the global quota (plus ``incoming_bytes``) are met."""
+        if owner is not None:
+            over = self.usage(owner).get("total", 0) + incoming_bytes - self.user_quota
+            if over > 0:
+                self.evict(over, owner)
+        over = self.usage().get("total", 0) + incoming_bytes - self.total_quota
+        if over > 0:
+            self.evict(over)
+
+    def has_room(self, owner, incoming_bytes):
+        """True if ``incoming_bytes`` fit the quotas once derived files have been evicted."""
+        self.enforce(owner, incoming_bytes)
+        user_total = self.usage(owner).get("total", 0)
+        total = self.usage().get("total", 0)
+        return (user_total + incoming_bytes <= self.user_quota
+                and total + incoming_bytes <= self.total_quota)
+
+    def sweep(self):
+        """GC orphans, expire derived files past their TTL and re-check quotas."""
+        self.gc()  # also rescans, dropping entries for vanished files
+        cutoff = time.time() - self.derived_ttl
+        with self.lock:
+            for path, entry in list(self.entries.items()):
+                if entry["kind"] == "derived" and entry["atime"] < cutoff:
+                    self._remove(path)
+            owners = {entry["owner"] for entry in self.entries.values() if entry["owner"]}
+        for owner in owners:
+            self.enforce(owner)
+        self.enforce()
+
+    def maybe_sweep(self):
+        """Queue a sweep at most once per ``sweep_interval`` (the key is idempotent per interval)."""
+        bucket = int(time.time() // max(self.sweep_interval, 1))
+        self.schedule(f"storage-sweep:{bucket}", self.sweep)
+
+    def find_orphans(self, since=None):
+        """Unreferenced originals plus derived files whose original is gone or orphaned.
+
+        With ``since`` only originals written after that timestamp are considered.
+        """
+        referenced = {os.path.abspath(path) for path in self.referenced_paths()}
+        cutoff = time.time() - ORPHAN_GRACE_SECONDS
+        self.scan()
+        with self.lock:
+            orphans = []
+            originals = {}  # {(dir, stem): is_orphan}
+            for path, entry in self.entries.items():
+                if entry["kind"] != "original":
+                    continue
+                is_orphan = (
+                    os.path.abspath(path) not in referenced
+                    and entry["atime"] < cutoff
+                    and (since is None or os.path.getmtime(path) >= since)
+                )
+                originals[(os.path.dirname(path), os.path.splitext(os.path.basename(path))[0])] = is_orphan
+                if is_orphan:
+                    orphans.append(path)
+            for path, entry in self.entries.items():
+                if entry["kind"] == "derived" and DERIVED_SUFFIX.search(path):
+                    stem = DERIVED_SUFFIX.sub("", os.path.basename(path))
+                    if originals.get((os.path.dirname(path), stem), True):
+                        orphans.append(path)
+            return orphans
+
+    def gc(self, dry_run=False, since=None):
+        """Remove orphaned files and empty shard directories. Returns (files, bytes)."""
+        orphans = self.find_orphans(since)
+        with self.lock:
+            size = sum(self.entries[p]["size"] for p in orphans)
+            if dry_run:
+                return orphans, size
+            for path in orphans:
+                self._remove(path)
+        for root in self._roots():
+            for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+                if dirpath != root and not dirnames and not filenames:
+                    try:
+                        os.rmdir(dirpath)
+                    except OSError:
+                        pass
+        return orphans, size
+
+    def stats(self):
+        with self.lock:
+            return {
+                "files": len(self.entries),
+                "usage": self.usage(),
+                "evicted_files": self.evicted_files,
+                "evicted_bytes": self.evicted_bytes,
+                "quota": {"user": self.user_quota, "total": self.total_quota},
+            }
@@ -0,0 +1,39 @@
+"""Shared fixtures: import app.py against throwaway state and annotation stores."""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+_DATA_DIR = tempfile.mkdtemp(prefix="satellisense-tests-")
+os.environ.setdefault("STATE_DB_PATH", os.path.join(_DATA_DIR, "state.sqlite3"))
+os.environ.setdefault("ANNOTATIONS_DB_PATH", os.path.join(_DATA_DIR, "annotations.sqlite3"))
+os.environ.setdefault("INGEST_LEDGER_DIR", os.path.join(_DATA_DIR, "ingest"))
+os.environ.setdefault("FLASK_SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import app as m  # noqa: E402
+
+m.app.config["UPLOAD_FOLDER"] = os.path.join(_DATA_DIR, "uploads")
+
+
+@pytest.fixture(scope="session")
+def appmod():
+    return m
+
+
+@pytest.fixture
+def client(appmod):
+    appmod.app.config["TESTING"] = True
+    return appmod.app.test_client()
+
+
+def login(client, username="tester", password="secret-pass"):
+    """Register (first call) or log in ``username`` and return the client."""
+    response = client.post("/auth", json={"username": username, "password": password})
+    assert response.status_code == 200, response.get_json()
+    return client
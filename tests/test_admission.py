@@ -0,0 +1,103 @@
+import io
+
+import pytest
+
+from conftest import login
+
+
+class TrackingStream(io.BytesIO):
+    """Request body that records whether anything read it."""
+
+    touched = False
+
+    def read(self, *args):
+        self.touched = True
+        return super().read(*args)
+
+    readline = read
+
+
+def _multipart_body(depth=None):
+    boundary = "testboundary"
+    parts = [("area", "General")] + ([("depth", depth)] if depth else [])
+    body = b"".join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in parts
+    )
+    body += (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="a.png"\r\n'
+             f"Content-Type: image/png\r\n\r\n").encode() + b"\x89PNG" + b"\0" * 4096
+    body += f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+@pytest.fixture
+def full_gates(appmod, monkeypatch):
+    """Both concurrency classes with their only slot taken and no queue."""
+    gates = {name: appmod.AdmissionGate(name, limit=1, queue=0, timeout=0.1) for name in ("upstream", "compute")}
+    for gate in gates.values():
+        assert gate.acquire()
+    monkeypatch.setattr(appmod, "ADMISSION", gates)
+    return gates
+
+
+def _post(client, query="", headers=None, depth=None):
+    body, content_type = _multipart_body(depth)
+    stream = TrackingStream(body)
+    response = client.post(f"/analyze_image{query}", input_stream=stream, content_type=content_type,
+                           content_length=len(body), headers=headers or {})
+    return response, stream
+
+
+def test_shed_request_body_is_never_read(client, full_gates):
+    login(client)
+    response, stream = _post(client, depth="quick")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+    assert not stream.touched
+    # A form-only depth cannot be seen before admission, so it counts against the upstream class
+    assert (full_gates["upstream"].rejected, full_gates["compute"].rejected) == (1, 0)
+
+
+@pytest.mark.parametrize("query, headers", [("?depth=quick", None), ("", {"X-Analysis-Depth": "quick"})])
+def test_quick_depth_from_query_or_header_uses_compute_class(client, full_gates, query, headers):
+    login(client)
+    response, stream = _post(client, query=query, headers=headers)
+    assert response.status_code == 503
+    assert not stream.touched
+    assert (full_gates["upstream"].rejected, full_gates["compute"].rejected) == (0, 1)
+
+
+
+def test_released_slot_is_never_left_idle(appmod, monkeypatch):
+    import threading
+    import time
+
+    clock = [1000.0]
+    monkeypatch.setattr(appmod.time, "monotonic", lambda: clock[0])
+    gate = appmod.AdmissionGate("test", limit=1, queue=2, timeout=10)
+    assert gate.acquire()
+    results = {}
+
+    def waiter(name):
+        results[name] = gate.acquire()
+
+    threads = []
+    for name in ("expired", "live"):
+        threads.append(threading.Thread(target=waiter, args=(name,)))
+        threads[-1].start()
+        while gate.waiting < len(threads):
+            time.sleep(0.001)
+        clock[0] += 5
+    clock[0] += 2  # now past the first waiter's deadline, not the second's
+
+    gate.release(0.1)
+    deadline = time.time() + 1
+    while gate.active == 0 and time.time() < deadline:
+        time.sleep(0.001)
+    assert gate.active == 1  # the freed slot went to a waiter straight away
+    gate.release(0.1)
+    for thread in threads:
+        thread.join(1)
+        assert not thread.is_alive()
+    assert list(results.values()).count(True) >= 1
+    assert gate.waiting == 0
@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+
+def _record(rng, username, i):
+    record = {
+        "id": f"{username}_{i:04d}",
+        "timestamp": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{i // 60 % 24:02d}:{i % 60:02d}:00",
+        "area": rng.choice(["Coast", "Delta", "Forest"]),
+    }
+    if rng.random() < 0.6:
+        water = rng.randint(0, 8) / 8  # exact in binary, so sums do not drift
+        record["land_cover"] = {"water": water, "vegetation": 1 - water}
+        record["severity"] = rng.choice(["none", "low", "high"])
+        record["features"] = [{"name": "f", "category": rng.choice(["water", "urban"])}]
+    return record
+
+
+def _rebuild(appmod, records):
+    aggregates = appmod.AnalyticsAggregates()
+    for record in records:
+        aggregates.add(record)
+    return aggregates
+
+
+def test_incremental_aggregates_match_a_full_rebuild(appmod):
+    rng = random.Random(7)
+    username = "aggregates-user"
+    live = []
+    for i in range(300):
+        if live and rng.random() < 0.35:
+            victim = live.pop(rng.randrange(len(live)))
+            assert appmod.delete_history_record(username, victim["id"]) is not None
+        else:
+            record = _record(rng, username, i)
+            appmod.add_history_record(username, record)
+            live.append(record)
+        if i == 20:
+            appmod.get_user_aggregates(username)  # from here on the counters are updated in place
+
+    incremental = appmod.get_user_aggregates(username)
+    rebuilt = _rebuild(appmod, appmod.STATE.user_records(username))
+    assert incremental.snapshot() == rebuilt.snapshot()
+    assert incremental.recent() == rebuilt.recent()
+    assert incremental.snapshot()["total_analyses"] == len(live)
+
+
+def test_global_sql_aggregates_match_a_full_rebuild(appmod):
+    rng = random.Random(11)
+    for n, username in enumerate(["global-a", "global-b"]):
+        appmod.add_history_records(username, [_record(rng, username, 1000 * n + i) for i in range(40)])
+    appmod.delete_history_record("global-a", "global-a_0003")
+
+    stats = appmod.global_aggregates()
+    rows = list(appmod.STATE.records(page_size=7))
+    expected = _rebuild(appmod, (record for _, record in rows)).snapshot()
+    assert stats.pop("active_users") == len({username for username, _ in rows})
+    assert stats.pop("mean_land_cover") == pytest.approx(expected.pop("mean_land_cover"))
+    assert stats == expected
@@ -0,0 +1,41 @@
+import pytest
+
+from conftest import login
+
+
+@pytest.fixture
+def annotator(client):
+    return login(client, "annotator")
+
+
+def _add(client, image_id, x=5):
+    response = client.post("/annotations", json={
+        "image_id": image_id, "type": "point", "geometry": {"x": x, "y": 5}, "text": "well",
+    })
+    assert response.status_code == 200
+    return response.get_json()["annotation"]["id"]
+
+
+def test_delete_requires_image_id(annotator):
+    annotation_id = _add(annotator, "scene_a")
+    response = annotator.delete("/annotations", json={"annotation_id": annotation_id})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("image_id", ["scene_in_history", "scene_since_deleted"])
+def test_any_annotation_the_user_can_create_can_be_deleted(annotator, image_id):
+    annotation_id = _add(annotator, image_id)
+    listed = annotator.get(f"/annotations?image_id={image_id}").get_json()["annotations"]
+    assert [a["id"] for a in listed] == [annotation_id]
+    response = annotator.delete("/annotations", json={"image_id": image_id, "annotation_id": annotation_id})
+    assert response.status_code == 200
+    assert response.get_json()["deleted"] == 1
+
+
+def test_annotations_are_isolated_per_user(appmod, annotator):
+    annotation_id = _add(annotator, "shared_name")
+    other = login(appmod.app.test_client(), "someone-else")
+    assert other.get("/annotations?image_id=shared_name").get_json()["annotations"] == []
+    response = other.delete("/annotations", json={"image_id": "shared_name", "annotation_id": annotation_id})
+    assert response.status_code == 404
+    assert len(annotator.get("/annotations?image_id=shared_name").get_json()["annotations"]) == 1
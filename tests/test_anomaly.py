@@ -0,0 +1,29 @@
+import math
+
+from PIL import Image
+
+
+def test_tile_stats_of_an_image_smaller_than_one_tile(appmod, tmp_path):
+    path = str(tmp_path / "tiny.png")
+    Image.new("RGB", (20, 12), (10, 200, 30)).save(path)
+    stats = appmod.compute_tile_stats(path)
+    assert len(stats["mean"]) == len(appmod.TILE_FEATURES)
+    assert all(math.isfinite(v) for v in stats["mean"] + stats["std"])
+
+
+def test_prescreen_of_a_tiny_image_scores_one_tile(appmod, tmp_path):
+    path = str(tmp_path / "tiny.png")
+    Image.new("RGB", (20, 12), (10, 200, 30)).save(path)
+    result = appmod.anomaly_prescreen(path)
+    assert result["scores"] == [[0.0]]
+    assert result["flagged_regions"] == []
+    assert result["tile_size_px"] == 20
+
+
+def test_prescreen_flags_a_bright_patch(appmod, tmp_path):
+    path = str(tmp_path / "scene.png")
+    img = Image.new("RGB", (256, 256), (40, 90, 40))
+    img.paste((250, 250, 250), (64, 64, 96, 96))
+    img.save(path)
+    result = appmod.anomaly_prescreen(path)
+    assert result["flagged_regions"][0]["box"] == [64, 64, 96, 96]
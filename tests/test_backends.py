@@ -0,0 +1,36 @@
+def test_quick_depth_routes_quick_tasks_to_the_local_backend(appmod):
+    assert appmod.backend_for("analyze", "quick") == "local"
+    assert appmod.backend_for("batch", "quick") == "local"
+    assert appmod.backend_for("compare", "quick") == "gemini"  # not a quick task
+    assert appmod.backend_for("analyze") == "gemini"
+
+
+def test_routes_and_fallbacks(appmod, monkeypatch):
+    monkeypatch.setattr(appmod, "MODEL_ROUTES", {"batch": "local", "chat": "local", "compare": "nonexistent"})
+    assert appmod.backend_for("batch") == "local"
+    assert appmod.backend_for("batch", "deep") == appmod.MODEL_FALLBACK
+    assert appmod.backend_for("chat") == appmod.MODEL_FALLBACK  # local cannot serve chat
+    assert appmod.backend_for("compare") == "gemini"
+
+
+def test_declined_request_falls_back(appmod, monkeypatch):
+    calls = []
+
+    class Recorder:
+        def generate(self, contents, system_instruction=None, response_schema=None, model=None):
+            calls.append(contents)
+            return {"candidates": []}
+
+    monkeypatch.setitem(appmod.MODEL_BACKENDS, appmod.MODEL_FALLBACK, Recorder())
+    response = appmod.call_model("analyze", [{"role": "user", "parts": [{"text": "hi"}]}], depth="quick")
+    assert response["backend"] == appmod.MODEL_FALLBACK
+    assert len(calls) == 1
+
+
+def test_depth_from_query_and_header(appmod):
+    with appmod.app.test_request_context("/analyze?depth=quick"):
+        assert appmod.request_depth() == "quick"
+    with appmod.app.test_request_context("/analyze", headers={appmod.DEPTH_HEADER: "DEEP"}):
+        assert appmod.request_depth() == "deep"
+    with appmod.app.test_request_context("/analyze?depth=bogus"):
+        assert appmod.request_depth() is None
@@ -0,0 +1,31 @@
+from satellisense.cache import LRUCache
+
+
+def test_entry_bound_evicts_the_least_recently_used():
+    evicted = []
+    cache = LRUCache(max_entries=2, on_evict=lambda key, value: evicted.append(key))
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the oldest
+    cache.put("c", 3)
+    assert evicted == ["b"]
+    assert "b" not in cache and cache.keys() == ["a", "c"]
+
+
+def test_size_bound_and_oversized_values():
+    cache = LRUCache(max_size=10, sizeof=len)
+    assert cache.put("a", b"12345")
+    assert cache.put("b", b"123456")  # 11 bytes in total: "a" goes
+    assert "a" not in cache and cache.size == 6
+    assert not cache.put("huge", b"x" * 11)
+    assert "huge" not in cache
+
+    cache.put("b", b"12")  # replacing an entry re-counts its size
+    assert cache.size == 2
+    assert cache.pop("b") == b"12" and cache.size == 0
+
+
+def test_setdefault_keeps_the_first_value():
+    cache = LRUCache(max_entries=4)
+    assert cache.setdefault("k", "first") == "first"
+    assert cache.setdefault("k", "second") == "first"
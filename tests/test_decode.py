@@ -0,0 +1,26 @@
+import pytest
+from PIL import Image
+
+
+@pytest.fixture
+def scene(tmp_path):
+    path = str(tmp_path / "scene.png")
+    Image.new("RGB", (300, 200), (10, 120, 40)).save(path)
+    return path
+
+
+def test_full_images_are_only_loaded_under_a_reservation(appmod, scene):
+    with pytest.raises(RuntimeError):
+        appmod.load_rgb_full(scene)
+    governor = appmod.DECODE_GOVERNOR
+    with appmod.full_decode_slot(scene):
+        img = appmod.load_rgb_full(scene)
+        assert img.size == (300, 200)
+        assert governor.in_use >= appmod.decoded_bytes("RGB", img.size)
+    assert not governor.holding()
+
+
+def test_thumbnail_reservation_ends_with_the_decode(appmod, scene):
+    in_use = appmod.DECODE_GOVERNOR.in_use
+    assert appmod.load_rgb_thumbnail(scene, 64).size == (64, 43)
+    assert appmod.DECODE_GOVERNOR.in_use == in_use
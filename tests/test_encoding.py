@@ -0,0 +1,60 @@
+import base64
+import io
+
+import numpy as np
+from PIL import Image
+
+PROFILE = {
+    "max_dim": 1024, "quality": 85, "format": "JPEG",
+    "budget_bytes": 400_000, "min_dim": 160, "min_quality": 60,
+}
+
+
+def _noise(path, seed, size=1024):
+    rng = np.random.default_rng(seed)
+    Image.fromarray(rng.integers(0, 256, (size, size, 3), dtype=np.uint8)).save(path)
+    return str(path)
+
+
+def _dims(payload):
+    return Image.open(io.BytesIO(base64.b64decode(payload[1]))).size
+
+
+def test_images_share_the_task_budget(appmod, tmp_path, monkeypatch):
+    monkeypatch.setitem(appmod.ENCODING_PROFILES, "budget-test", dict(PROFILE))
+    paths = [_noise(tmp_path / f"{i}.png", i) for i in range(4)]
+
+    two = appmod.encode_images_for_task(paths[:2], "budget-test")
+    four = appmod.encode_images_for_task(paths, "budget-test")
+    for payloads, count in ((two, 2), (four, 4)):
+        assert all(mime == "image/jpeg" for mime, _ in payloads)
+        assert all(len(data) <= PROFILE["budget_bytes"] // count for _, data in payloads)
+        assert sum(len(data) for _, data in payloads) <= PROFILE["budget_bytes"]
+    # More images in one request means a smaller share (and picture) for each
+    assert max(_dims(four[0])) < max(_dims(two[0]))
+
+
+def test_budget_never_shrinks_below_the_profile_floor(appmod, tmp_path, monkeypatch):
+    monkeypatch.setitem(appmod.ENCODING_PROFILES, "budget-floor", dict(PROFILE, budget_bytes=2_000))
+    (mime, data), = appmod.encode_images_for_task([_noise(tmp_path / "n.png", 9)], "budget-floor")
+    assert data and max(_dims((mime, data))) >= PROFILE["min_dim"]  # best effort, still usable
+
+
+def test_tasks_without_a_budget_keep_the_profile_size(appmod, tmp_path, monkeypatch):
+    monkeypatch.setitem(appmod.ENCODING_PROFILES, "no-budget", {"max_dim": 512, "quality": 85, "format": "JPEG"})
+    paths = [_noise(tmp_path / f"{i}.png", 20 + i) for i in range(3)]
+    assert all(max(_dims(p)) == 512 for p in appmod.encode_images_for_task(paths, "no-budget"))
+
+
+def test_payloads_are_cached_per_budget_share(appmod, tmp_path, monkeypatch):
+    monkeypatch.setitem(appmod.ENCODING_PROFILES, "budget-cache", dict(PROFILE))
+    paths = [_noise(tmp_path / f"{i}.png", 30 + i) for i in range(2)]
+    appmod.encode_images_for_task(paths, "budget-cache")
+
+    calls = []
+    encode = appmod._encode_image_for_task
+    monkeypatch.setattr(appmod, "_encode_image_for_task", lambda *a: calls.append(a) or encode(*a))
+    appmod.encode_images_for_task(paths, "budget-cache")
+    assert calls == []
+    appmod.encode_images_for_task(paths + [paths[0]], "budget-cache")  # new share size: each file re-encoded once
+    assert len(calls) == 2
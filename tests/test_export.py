@@ -0,0 +1,67 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from conftest import login
+
+USER = "exporter"
+
+
+@pytest.fixture
+def exporter(appmod, client, monkeypatch):
+    monkeypatch.setattr(appmod.EXPORTER, "page_rows", 3)  # several pages / row groups
+    login(client, USER)
+    if not appmod.STATE.user_version(USER):
+        appmod.add_history_records(USER, [
+            {
+                "id": f"{USER}_{i}",
+                "timestamp": f"2026-02-{i + 1:02d}T10:00:00",
+                "area": "Delta" if i % 2 else "Coast",
+                "insights": f"Scene {i}: water and vegetation",
+                "land_cover": {"water": 0.1 * i, "vegetation": 1 - 0.1 * i},
+                "severity": "low",
+            }
+            for i in range(8)
+        ])
+    return client
+
+
+def _ndjson(response):
+    body = response.data
+    if response.headers.get("Content-Encoding") == "gzip":
+        body = gzip.decompress(body)
+    return [json.loads(line) for line in body.decode("utf-8").splitlines()]
+
+
+@pytest.mark.parametrize("dataset", ["history", "metrics", "changes"])
+def test_ndjson_round_trip(appmod, exporter, dataset):
+    rows = _ndjson(exporter.get(f"/export?dataset={dataset}"))
+    assert rows
+    columns = [name for name, _ in appmod.EXPORT_COLUMNS[dataset]]
+    assert all(list(row) == columns for row in rows)
+    if dataset == "history":
+        assert [row["id"] for row in rows] == [f"{USER}_{i}" for i in range(8)]
+        assert rows[3]["cover_water"] == pytest.approx(0.3)
+    gzipped = exporter.get(f"/export?dataset={dataset}", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert _ndjson(gzipped) == rows
+
+
+def test_ranged_exports_resume_from_the_last_cursor(exporter):
+    full = _ndjson(exporter.get("/export?dataset=history"))
+    first = _ndjson(exporter.get("/export?dataset=history&limit=5"))
+    rest = _ndjson(exporter.get("/export", query_string={"dataset": "history", "after": first[-1]["cursor"]}))
+    assert first + rest == full
+
+
+def test_parquet_round_trip(appmod, exporter):
+    pq = pytest.importorskip("pyarrow.parquet")
+    for dataset in ("history", "metrics"):
+        expected = _ndjson(exporter.get(f"/export?dataset={dataset}"))
+        response = exporter.get(f"/export?dataset={dataset}&format=parquet")
+        assert response.status_code == 200
+        table = pq.read_table(io.BytesIO(response.data))
+        assert table.column_names == [name for name, _ in appmod.EXPORT_COLUMNS[dataset]]
+        assert table.to_pylist() == expected
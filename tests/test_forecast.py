@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+
+def _series(start, step, values, name="brightness_mean"):
+    timestamps = [(start + step * i).isoformat() for i in range(len(values))]
+    return timestamps, [{name: v} for v in values]
+
+
+def test_same_day_records_are_insufficient_history(appmod):
+    # Records seconds apart used to drive Holt's initial trend to ~1e5
+    timestamps, rows = _series(datetime(2026, 5, 1, 9, 0), timedelta(seconds=3), [0.245, 0.251, 0.248, 0.250])
+    result = appmod.forecast_metrics(timestamps, rows, 90)
+    assert result["insufficient_history"] is True
+    assert result["metrics"] == {}
+    assert "different days" in result["reason"]
+
+
+def test_short_span_is_insufficient_history(appmod, monkeypatch):
+    # Two calendar days, but only minutes apart around midnight
+    monkeypatch.setattr(appmod, "FORECAST_MIN_POINTS", 2)
+    timestamps = ["2026-05-01T23:58:00", "2026-05-01T23:59:00", "2026-05-02T00:01:00"]
+    rows = [{"brightness_mean": v} for v in (0.2, 0.3, 0.25)]
+    result = appmod.forecast_metrics(timestamps, rows, 30)
+    assert result["insufficient_history"] is True
+    assert "span" in result["reason"]
+
+
+def test_same_day_duplicates_do_not_blow_up_trend(appmod):
+    start = datetime(2026, 1, 1, 12, 0)
+    timestamps, rows = _series(start, timedelta(days=10), [0.30, 0.32, 0.34, 0.36])
+    # A burst of near-identical uploads seconds after the last scene
+    for i in range(1, 4):
+        timestamps.append((start + timedelta(days=30, seconds=i)).isoformat())
+        rows.append({"brightness_mean": 0.36 + 0.01 * i})
+    result = appmod.forecast_metrics(timestamps, rows, 90)
+    info = result["metrics"]["brightness_mean"]
+    assert abs(info["slope_per_day"]) < 0.01
+    for point in info["forecast"]:
+        assert 0.0 <= point["lower"] <= point["value"] <= point["upper"] <= 1.0
+
+
+def test_linear_series_is_recovered(appmod):
+    timestamps, rows = _series(datetime(2026, 1, 1), timedelta(days=7), [0.1 + 0.01 * i for i in range(8)])
+    result = appmod.forecast_metrics(timestamps, rows, 28)
+    info = result["metrics"]["brightness_mean"]
+    assert abs(info["slope_per_day"] - 0.01 / 7) < 1e-6
+    assert abs(info["forecast"][-1]["value"] - (0.17 + 0.04)) < 1e-3
+    assert info["bounded"] and not info["extrapolated"]
+
+
+def test_fraction_and_bounded_metrics_are_clipped(appmod):
+    timestamps, rows = _series(datetime(2026, 1, 1), timedelta(days=1), [0.7, 0.8, 0.9, 0.98], "water_fraction")
+    for row, v in zip(rows, (0.7, 0.8, 0.9, 0.98)):
+        row["brightness_mean"] = v
+    result = appmod.forecast_metrics(timestamps, rows, 365)
+    for name in ("water_fraction", "brightness_mean"):
+        for point in result["metrics"][name]["forecast"]:
+            assert 0.0 <= point["lower"] and point["upper"] <= 1.0
+
+
+def test_unbounded_metric_is_flagged_when_extrapolating(appmod):
+    timestamps, rows = _series(datetime(2026, 1, 1), timedelta(days=1), [1.0, 2.0, 3.0], "ndvi_custom")
+    result = appmod.forecast_metrics(timestamps, rows, 365)
+    info = result["metrics"]["ndvi_custom"]
+    assert not info["bounded"]
+    assert info["extrapolated"]
+    assert "extrapolated" in appmod.summarize_forecast(result, "t")
+
+
+def test_summary_reports_insufficient_history(appmod):
+    result = appmod.forecast_metrics(["2026-01-01T00:00:00"], [{"brightness_mean": 0.2}], 30)
+    assert result["reason"] in appmod.summarize_forecast(result, "t")
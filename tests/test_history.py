@@ -0,0 +1,103 @@
+import gzip
+import json
+
+from conftest import login
+
+
+def _seed(appmod, username, count, area="Coast"):
+    records = [
+        {
+            "id": f"{username}_{i:03d}",
+            # Pairs share a timestamp so the id tie-break is exercised
+            "timestamp": f"2026-04-{i // 2 + 1:02d}T12:00:00",
+            "area": area if i % 3 else "Delta",
+            "image_url": f"/static/uploads/{username}_{i}.png",
+            "insights": "x" * 200,
+        }
+        for i in range(count)
+    ]
+    appmod.add_history_records(username, records)
+    return records
+
+
+def _pages(client, query):
+    seen, cursor = [], None
+    while True:
+        url = f"/history?{query}" + (f"&cursor={cursor}" if cursor else "")
+        body = client.get(url).get_json()
+        seen.append([r["id"] for r in body["history"]])
+        cursor = body["next_cursor"]
+        if not cursor:
+            return seen
+
+
+def test_cursor_pages_cover_every_record_once_newest_first(appmod, client):
+    login(client, "pager")
+    records = _seed(appmod, "pager", 11)
+    expected = [r["id"] for r in sorted(records, key=lambda r: (r["timestamp"], r["id"]), reverse=True)]
+    pages = _pages(client, "limit=4")
+    assert [len(p) for p in pages] == [4, 4, 3]
+    assert [i for page in pages for i in page] == expected
+
+
+def test_no_cursor_when_the_last_page_is_full(appmod, client):
+    login(client, "pager-exact")
+    _seed(appmod, "pager-exact", 6)
+    assert [len(p) for p in _pages(client, "limit=3")] == [3, 3]
+
+
+def test_cursor_combines_with_filters(appmod, client):
+    login(client, "pager-filter")
+    records = _seed(appmod, "pager-filter", 12)
+    expected = [
+        r["id"] for r in sorted(records, key=lambda r: (r["timestamp"], r["id"]), reverse=True)
+        if r["area"] == "Coast" and "2026-04-02" <= r["timestamp"][:10] <= "2026-04-05"
+    ]
+    pages = _pages(client, "limit=2&area=Coast&from=2026-04-02&to=2026-04-05")
+    assert [i for page in pages for i in page] == expected  # "to" as a bare date includes that day
+
+
+def test_invalid_cursor_is_rejected(client):
+    login(client, "pager-bad")
+    assert client.get("/history?cursor=not-a-cursor").status_code == 400
+
+
+def test_history_etag_revalidates_until_the_history_changes(appmod, client):
+    login(client, "etag-user")
+    _seed(appmod, "etag-user", 2)
+    first = client.get("/history")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and etag
+
+    again = client.get("/history", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.headers["ETag"] == etag and not again.data
+
+    appmod.add_history_record("etag-user", {"id": "etag-user_new", "timestamp": "2026-05-01", "area": "x"})
+    changed = client.get("/history", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    # The ETag also covers the query string
+    assert client.get("/history?limit=1").headers["ETag"] != changed.headers["ETag"]
+
+
+def test_large_json_is_gzipped_with_its_own_etag(appmod, client):
+    login(client, "gzip-user")
+    _seed(appmod, "gzip-user", 20)
+    plain = client.get("/history?fields=id,insights")
+    assert "Content-Encoding" not in plain.headers
+
+    zipped = client.get("/history?fields=id,insights", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in zipped.headers["Vary"]
+    assert zipped.headers["ETag"].strip('"').endswith("-gzip")
+    assert json.loads(gzip.decompress(zipped.data)) == plain.get_json()
+
+    revalidated = client.get(
+        "/history?fields=id,insights", headers={"Accept-Encoding": "gzip", "If-None-Match": zipped.headers["ETag"]}
+    )
+    assert revalidated.status_code == 304
+
+
+def test_small_json_is_not_compressed(client):
+    login(client, "gzip-small")
+    response = client.get("/history", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
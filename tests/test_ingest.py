@@ -0,0 +1,61 @@
+import json
+
+import pytest
+from PIL import Image
+
+
+@pytest.fixture
+def scenes(tmp_path):
+    source = tmp_path / "scenes"
+    source.mkdir()
+    for i in range(5):
+        Image.new("RGB", (64, 64), (40 * i, 120, 60)).save(source / f"scene_{i}.png")
+    return source
+
+
+def _ledger_status(path):
+    statuses = {}
+    with open(path) as fh:
+        for line in fh:
+            entry = json.loads(line)
+            statuses[entry["source"]] = entry["status"]
+    return statuses
+
+
+def _stored(appmod, username):
+    return [record for _, record in appmod.STATE.history_page(100, username=username)]
+
+
+def test_resume_after_interrupted_flush(appmod, scenes, tmp_path, monkeypatch):
+    username = "ingest-resume"
+    ledger = tmp_path / "ledger.jsonl"
+    monkeypatch.setattr(appmod, "INGEST_FLUSH_EVERY", 2)
+    monkeypatch.setattr(appmod, "analyze_ingest_scene", lambda *args, **kwargs: ("Water river field.", None))
+    real_add = appmod.add_history_records
+    calls = []
+
+    def fail_after_first_flush(user, records):
+        calls.append(len(records))
+        if len(calls) > 1:
+            raise RuntimeError("disk full")
+        real_add(user, records)
+
+    monkeypatch.setattr(appmod, "add_history_records", fail_after_first_flush)
+    args = ["ingest", str(scenes), "--user", username, "--workers", "1", "--checkpoint", str(ledger)]
+    result = appmod.app.test_cli_runner().invoke(args=args)
+    assert isinstance(result.exception, RuntimeError)
+
+    # Only the committed flush may be marked done in the ledger
+    stored = _stored(appmod, username)
+    done = [src for src, status in _ledger_status(ledger).items() if status == "done"]
+    assert len(stored) == 2
+    assert sorted(done) == sorted(record["source_path"] for record in stored)
+
+    monkeypatch.setattr(appmod, "add_history_records", real_add)
+    result = appmod.app.test_cli_runner().invoke(args=args)
+    assert result.exception is None, result.output
+    stored = _stored(appmod, username)
+    assert len(stored) == 5
+    assert len({record["id"] for record in stored}) == 5
+    assert set(_ledger_status(ledger).values()) == {"done"}
+    assert len(_ledger_status(ledger)) == 5
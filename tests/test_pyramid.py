@@ -0,0 +1,31 @@
+import base64
+import io
+import os
+
+from PIL import Image
+
+
+def _scene_with_stale_looking_pyramid(appmod, tmp_path):
+    """A red original whose 256 px pyramid level is green, so reads show which file was used."""
+    source = str(tmp_path / "scene.png")
+    Image.new("RGB", (600, 600), (255, 0, 0)).save(source)
+    level = appmod.pyramid_path_for(source, 256)
+    Image.new("RGB", (256, 256), (0, 255, 0)).save(level, format="JPEG", quality=95)
+    stat = os.stat(source)
+    os.utime(level, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    return source
+
+
+def test_metrics_and_masks_read_the_original(appmod, tmp_path):
+    source = _scene_with_stale_looking_pyramid(appmod, tmp_path)
+    metrics = appmod.compute_image_metrics(source)
+    assert metrics["vegetation_fraction"] == 0.0
+    assert abs(metrics["brightness_mean"] - 1 / 3) < 0.01
+    assert appmod.load_rgb_thumbnail(source, 256).getpixel((0, 0)) == (255, 0, 0)
+
+
+def test_model_payloads_may_use_the_pyramid(appmod, tmp_path):
+    source = _scene_with_stale_looking_pyramid(appmod, tmp_path)
+    _, b64 = appmod.image_to_base64_optimized(source, max_dim=256)
+    r, g, b = Image.open(io.BytesIO(base64.b64decode(b64))).convert("RGB").getpixel((10, 10))
+    assert g > 200 and r < 50
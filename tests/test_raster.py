@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+import pytest
+
+tifffile = pytest.importorskip("tifffile")
+
+
+def _open_fds():
+    return len(os.listdir("/proc/self/fd"))
+
+
+@pytest.fixture
+def multispectral(tmp_path):
+    path = str(tmp_path / "ms.tif")
+    rng = np.random.default_rng(0)
+    tifffile.imwrite(path, rng.integers(0, 4000, size=(6, 64, 64), dtype=np.uint16), photometric="minisblack")
+    return path
+
+
+def test_raster_context_manager_closes_the_tiff(appmod, multispectral):
+    with appmod.Raster(multispectral) as raster:
+        assert raster.band_count == 6
+        ndvi = raster.evaluate("(nir - red) / (nir + red)")
+        assert ndvi.shape == (64, 64)
+    assert raster._tiff is None and raster._array is None
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_repeated_reads_do_not_leak_descriptors(appmod, multispectral):
+    appmod.get_image_size(multispectral)
+    appmod.load_rgb_thumbnail(multispectral, 32)
+    before = _open_fds()
+    for _ in range(50):
+        assert appmod.get_image_size(multispectral) == (64, 64)
+        assert appmod.load_rgb_thumbnail(multispectral, 32).size == (32, 32)
+        with appmod.full_decode_slot(multispectral):
+            appmod.load_rgb_full(multispectral)
+    assert _open_fds() <= before
@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+
+def _scene(path, shift=(0, 0)):
+    rng = np.random.default_rng(3)
+    base = rng.random((40, 40, 3))
+    big = np.kron(base, np.ones((8, 8, 1)))  # 320x320 blocks: strong, unambiguous texture
+    big = np.roll(big, shift=(shift[1], shift[0]), axis=(0, 1))
+    Image.fromarray((big * 255).astype(np.uint8)).save(path)
+    return str(path)
+
+
+def test_registration_recovers_a_translation(appmod, tmp_path):
+    reference = _scene(tmp_path / "ref.png")
+    moving = _scene(tmp_path / "moving.png", shift=(12, -7))
+    transform = appmod.estimate_registration(reference, moving)
+    assert abs(transform["dx"] - 12) < 1.5 and abs(transform["dy"] + 7) < 1.5
+    assert transform["scale_x"] == transform["scale_y"] == 1.0
+
+
+def test_transforms_are_cached_per_ordered_pair(appmod, tmp_path, monkeypatch):
+    reference = _scene(tmp_path / "a.png")
+    moving = _scene(tmp_path / "b.png", shift=(4, 4))
+    calls = []
+    estimate = appmod.estimate_registration
+
+    def counting(ref, mov):
+        calls.append((ref, mov))
+        return estimate(ref, mov)
+
+    monkeypatch.setattr(appmod, "estimate_registration", counting)
+    first = appmod.get_registration(reference, moving)
+    assert appmod.get_registration(reference, moving) == first
+    assert len(calls) == 1
+
+    appmod.get_registration(moving, reference)  # the reverse direction is its own transform
+    assert len(calls) == 2
+
+    # Rewriting an image changes its fingerprint, so the stale transform is not reused
+    _scene(tmp_path / "b.png", shift=(6, 6))
+    stat = os.stat(moving)
+    os.utime(moving, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    appmod.get_registration(reference, moving)
+    assert len(calls) == 3
+
+
+def test_aligned_pairs_reuse_the_cached_transform(appmod, tmp_path, monkeypatch):
+    reference = _scene(tmp_path / "c.png")
+    moving = _scene(tmp_path / "d.png", shift=(3, 0))
+    appmod.get_registration(reference, moving)
+
+    def fail(*args):
+        raise AssertionError("registered again")
+
+    monkeypatch.setattr(appmod, "estimate_registration", fail)
+    ref_rgb, aligned, overlap, transform = appmod.get_aligned_pair(reference, moving, dim=128)
+    assert ref_rgb.shape == aligned.shape and overlap.shape == ref_rgb.shape[:2]
+    assert appmod.get_aligned_pair(reference, moving, dim=128)[3] == transform
@@ -0,0 +1,130 @@
+from conftest import login
+
+
+def test_analysis_ids_are_unique_within_one_second(appmod, monkeypatch):
+    monkeypatch.setattr(appmod.time, "time", lambda: 1_700_000_000.0)
+    ids = {appmod.new_analysis_id("same-second") for _ in range(1000)}
+    assert len(ids) == 1000
+
+
+def test_same_second_records_are_all_stored(appmod, monkeypatch):
+    username = "same-second"
+    monkeypatch.setattr(appmod.time, "time", lambda: 1_700_000_000.0)
+    records = [
+        {"id": appmod.new_analysis_id(username), "timestamp": "2026-01-01T00:00:00", "area": "General"}
+        for _ in range(20)
+    ]
+    appmod.add_history_records(username, records)
+    stored = [record for _, record in appmod.STATE.history_page(100, username=username)]
+    assert sorted(r["id"] for r in stored) == sorted(r["id"] for r in records)
+    cached = [r["id"] for r in appmod.user_history(username)]
+    assert len(cached) == len(set(cached)) == 20
+
+
+def test_add_records_replaces_a_reused_id(appmod):
+    username = "replace-user"
+    appmod.STATE.add_records(username, [{"id": "fixed-id", "timestamp": "2026-01-01", "area": "a"}])
+    appmod.STATE.add_records(username, [{"id": "fixed-id", "timestamp": "2026-01-01", "area": "b"}])
+    stored = appmod.STATE.history_page(10, username=username)
+    assert [record["area"] for _, record in stored] == ["b"]
+
+
+def _other_worker(appmod, **kwargs):
+    """A second StateStore on the same database, standing in for another worker process."""
+    return appmod.StateStore(appmod.STATE_DB_PATH, **kwargs)
+
+
+def test_history_is_loaded_per_user_on_first_access(appmod):
+    other = _other_worker(appmod)
+    other.add_records("lazy-a", [{"id": "lazy-a-1", "timestamp": "2026-01-01T00:00:00", "area": "x"}])
+    other.add_records("lazy-b", [{"id": "lazy-b-1", "timestamp": "2026-01-01T00:00:00", "area": "x"}])
+    appmod.sync_history()
+    assert "lazy-a" not in appmod.HISTORY_DB and "lazy-b" not in appmod.HISTORY_DB
+
+    assert [r["id"] for r in appmod.user_history("lazy-a")] == ["lazy-a-1"]
+    assert "lazy-b" not in appmod.HISTORY_DB
+
+    # Writes by the other worker are replayed into the cached user on the next access
+    other.add_records("lazy-a", [{"id": "lazy-a-0", "timestamp": "2025-12-31T00:00:00", "area": "x"}])
+    other.delete_record("lazy-a", "lazy-a-1")
+    assert [r["id"] for r in appmod.user_history("lazy-a")] == ["lazy-a-0"]
+    assert appmod.get_user_aggregates("lazy-a").snapshot()["total_analyses"] == 1
+
+
+def test_user_versions_track_writes(appmod):
+    other = _other_worker(appmod)
+    assert appmod.STATE.user_version("versioned") == 0
+    seq = other.add_records("versioned", [{"id": "versioned-1", "timestamp": "2026-01-01", "area": "x"}])
+    assert appmod.STATE.user_version("versioned") == seq
+    other.delete_record("versioned", "versioned-1")
+    assert appmod.STATE.user_version("versioned") > seq
+    assert "versioned" in appmod.STATE.history_usernames()
+
+
+def test_compacted_log_resets_a_lagging_worker(appmod):
+    other = _other_worker(appmod, log_retain=5)
+    other.add_records("compact-a", [{"id": "compact-a-1", "timestamp": "2026-01-01", "area": "x"}])
+    assert [r["id"] for r in appmod.user_history("compact-a")] == ["compact-a-1"]
+
+    other.add_records("compact-a", [{"id": "compact-a-2", "timestamp": "2026-01-02", "area": "x"}])
+    for i in range(20):
+        other.add_records("compact-b", [{"id": f"compact-b-{i}", "timestamp": "2026-01-01", "area": "x"}])
+    log_rows = appmod.STATE._conn().execute("SELECT count(*) FROM history_log").fetchone()[0]
+    assert log_rows < 2 * 5
+
+    # Entries for compact-a were compacted away before this worker saw them; it reloads
+    assert [r["id"] for r in appmod.user_history("compact-a")] == ["compact-a-1", "compact-a-2"]
+
+
+def test_history_route_reads_from_the_store(appmod, client):
+    login(client, "sql-history")
+    _other_worker(appmod).add_records("sql-history", [
+        {"id": f"sql-history-{i}", "timestamp": f"2026-01-0{i + 1}T00:00:00", "area": "x"} for i in range(3)
+    ])
+    body = client.get("/history").get_json()
+    assert [r["id"] for r in body["history"]] == ["sql-history-2", "sql-history-1", "sql-history-0"]
+    assert "sql-history" not in appmod.HISTORY_DB
+
+
+def test_global_aggregates_come_from_every_user(appmod):
+    _other_worker(appmod).add_records("global-only", [
+        {"id": "global-only-1", "timestamp": "2026-03-01T00:00:00", "area": "GlobalArea"}
+    ])
+    stats = appmod.global_aggregates()
+    assert stats["area_distribution"]["GlobalArea"] == 1
+    assert stats["active_users"] >= 1
+    assert "global-only" not in appmod.HISTORY_DB
+
+
+def test_precomputed_results_are_stored_and_replayed(appmod, tmp_path, monkeypatch):
+    from PIL import Image
+
+    path = str(tmp_path / "scene.png")
+    Image.new("RGB", (64, 64), (40, 120, 40)).save(path)
+    username = "precomputed"
+    appmod.add_history_records(username, [
+        {"id": "precomputed-1", "timestamp": "2026-01-01T00:00:00", "area": "x", "image_path": path}
+    ])
+    cached = appmod.user_history(username)[0]
+
+    # Another worker computes the results on its own copy of the record
+    other_copy = appmod.STATE.get_record(username, "precomputed-1")
+    monkeypatch.setattr(appmod, "STATE", _other_worker(appmod))
+    metrics = appmod.get_record_metrics(other_copy)
+    tile_stats = appmod.get_record_tile_stats(other_copy)
+    monkeypatch.undo()
+
+    stored = appmod.STATE.get_record(username, "precomputed-1")
+    assert stored["metrics"] == metrics and stored["tile_stats"] == tile_stats
+    appmod.user_history(username)  # replays the updates into this worker's cached record
+    assert cached["metrics"] == metrics and cached["tile_stats"] == tile_stats
+
+    # A restarted worker reads them back instead of decoding the image again
+    def fail(*args):
+        raise AssertionError("recomputed")
+
+    monkeypatch.setattr(appmod, "compute_image_metrics", fail)
+    monkeypatch.setattr(appmod, "compute_tile_stats", fail)
+    fresh = appmod.STATE.get_record(username, "precomputed-1")
+    assert appmod.get_record_metrics(fresh) == metrics
+    assert appmod.get_record_tile_stats(fresh) == tile_stats
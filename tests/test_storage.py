@@ -0,0 +1,55 @@
+import os
+
+
+def test_scan_queries_usernames_once(appmod, tmp_path):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    for i in range(20):
+        (uploads / f"alice_{1700000000 + i}_scene.png").write_bytes(b"x" * 10)
+    (uploads / "bob_smith_1700000000_scene.png").write_bytes(b"x")
+    calls = []
+
+    storage = appmod.StorageManager(
+        folders=lambda: (str(uploads), str(tmp_path / "charts")),
+        usernames=lambda: calls.append(1) or ["alice", "bob", "bob_smith"],
+    )
+    storage.scan()
+
+    assert len(calls) == 1
+    owners = {os.path.basename(path): entry["owner"] for path, entry in storage.entries.items()}
+    assert owners["alice_1700000000_scene.png"] == "alice"
+    assert owners["bob_smith_1700000000_scene.png"] == "bob_smith"
+
+
+def test_upload_target_rejects_paths_outside_the_folder(appmod):
+    import pytest
+
+    with appmod.app.test_request_context():
+        path, _ = appmod.upload_target("user_1_scene.png")
+        assert path.startswith(appmod.app.config["UPLOAD_FOLDER"])
+        for bad in ("user_1_../../../../escaped.png", "user/1_scene.png"):
+            with pytest.raises(ValueError):
+                appmod.upload_target(bad)
+
+
+def test_batch_upload_filenames_are_sanitised(appmod, client, monkeypatch):
+    import io
+
+    from PIL import Image
+
+    from conftest import login
+
+    login(client, "batch-traversal")
+    monkeypatch.setattr(appmod, "call_model", lambda *args, **kwargs: {"error": "offline"})
+    buf = io.BytesIO()
+    Image.new("RGB", (32, 32), (0, 120, 0)).save(buf, format="PNG")
+    upload_root = appmod.app.config["UPLOAD_FOLDER"]
+    outside = os.path.join(os.path.dirname(upload_root), "escaped.png")
+    response = client.post("/batch_analyze", data={
+        "area": "General",
+        "files": [(io.BytesIO(buf.getvalue()), "../../../../../escaped.png"), (io.BytesIO(b"x"), "notes.txt")],
+    }, content_type="multipart/form-data")
+    assert response.status_code == 200
+    assert not os.path.exists(outside)
+    skipped = response.get_json().get("skipped", [])
+    assert any(item.get("filename") == "notes.txt" for item in skipped)
@@ -0,0 +1,24 @@
+import pytest
+
+
+def _analysis(land_cover):
+    return {"summary": "ok", "land_cover": land_cover, "features": [], "severity": "none"}
+
+
+@pytest.mark.parametrize("cover, expected", [
+    ({"water": 0.3, "vegetation": 0.5}, {"water": 0.3, "vegetation": 0.5}),  # fractions, kept
+    ({"water": 30, "vegetation": 50}, {"water": 0.3, "vegetation": 0.5}),  # percentages
+    ({"water": 40, "vegetation": 0.6}, {"water": 0.4, "vegetation": 0.006}),  # mixed: one scale for all
+    ({"water": 0.6, "vegetation": 0.6}, {"water": 0.5, "vegetation": 0.5}),  # fractions over 1: renormalised
+    ({"water": 120, "vegetation": 80}, {"water": 0.6, "vegetation": 0.4}),  # over 100: renormalised
+    ({"water": -0.2, "vegetation": 0.5}, {"water": 0.0, "vegetation": 0.5}),
+])
+def test_land_cover_is_rescaled_as_a_whole(appmod, cover, expected):
+    land_cover = appmod.validate_analysis(_analysis(cover))["land_cover"]
+    assert {key: land_cover[key] for key in expected} == pytest.approx(expected)
+    assert sum(land_cover.values()) <= 1.0 + 1e-6
+
+
+def test_structured_output_is_opt_in(appmod):
+    assert appmod.structured_requested({}) is appmod.STRUCTURED_OUTPUT is False
+    assert appmod.structured_requested({"structured": "1"}) is True
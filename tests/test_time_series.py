@@ -0,0 +1,29 @@
+import pytest
+from PIL import Image
+
+from conftest import login
+
+USER = "series-user"
+
+
+@pytest.fixture
+def series(appmod, client, tmp_path, monkeypatch):
+    login(client, USER)
+    ids = []
+    for i in range(3):
+        path = str(tmp_path / f"t{i}.png")
+        Image.new("RGB", (64, 64), (30 * i, 120, 60)).save(path)
+        ids.append(f"{USER}_series_{i}")
+        appmod.add_history_records(USER, [{
+            "id": ids[-1], "timestamp": f"2026-03-0{i + 1}T00:00:00", "area": "Delta",
+            "image_path": path, "image_url": f"http://localhost/static/uploads/t{i}.png", "insights": "",
+        }])
+    monkeypatch.setattr(appmod, "call_model", lambda *args, **kwargs: {"error": "upstream quota exhausted"})
+    return ids
+
+
+@pytest.mark.parametrize("mode", ["single", "map_reduce"])
+def test_model_errors_return_500_in_both_modes(client, series, mode):
+    response = client.post("/time_series", json={"image_ids": series, "mode": mode})
+    assert response.status_code == 500
+    assert response.get_json() == {"success": False, "message": "upstream quota exhausted"}
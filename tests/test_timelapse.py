@@ -0,0 +1,11 @@
+import pytest
+
+from conftest import login
+
+
+@pytest.mark.parametrize("image_ids", [[{"id": "a"}, {"id": "b"}], [["a"], ["b"]], "ab", [1, 2]])
+def test_composite_rejects_non_string_ids(client, image_ids):
+    login(client)
+    response = client.post("/time_series/composite", json={"image_ids": image_ids})
+    assert response.status_code == 400
+    assert "list of strings" in response.get_json()["message"]